@@ -0,0 +1,94 @@
+"""Import-time budget for the helper modules and portfolioConstruction.
+
+Each module is imported in a fresh interpreter and checked for:
+
+* import time, measured on top of NumPy and pandas (which every module
+  needs anyway) and compared with a budget in milliseconds;
+* heavy optional libraries (plotting, Excel engines, SciPy) being pulled
+  in at import time;
+* side effects: changing the working directory.
+
+Exits with status 1 when any check fails, so it can run in CI::
+
+    python benchmarks/import_budget.py --budget-ms 150
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+from typing import Dict, List, Optional, Sequence
+
+SRC = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+
+MODULES = {
+    "helper": os.path.join(SRC, "helper"),
+    "hedgeFund": os.path.join(SRC, "helper"),
+    "resultsStore": os.path.join(SRC, "helper"),
+    "visulize": os.path.join(SRC, "helper"),
+    "portfolioConstruction": SRC,
+    "portfolioConstruction.instrumentation": SRC,
+    "portfolioConstruction.barra_equity_selector": SRC,
+    "portfolioConstruction.pipeline": SRC,
+}
+
+FORBIDDEN = ("matplotlib", "seaborn", "openpyxl", "scipy")
+
+_PROBE = """
+import importlib, json, os, sys, time
+sys.path.insert(0, {path!r})
+import numpy, pandas
+cwd = os.getcwd()
+start = time.perf_counter()
+importlib.import_module({module!r})
+elapsed = time.perf_counter() - start
+print(json.dumps({{
+    "seconds": elapsed,
+    "loaded": sorted(m for m in {forbidden!r} if m in sys.modules),
+    "cwd_changed": os.getcwd() != cwd,
+}}))
+"""
+
+
+def measure(module: str, path: str, repeat: int = 3) -> Dict[str, object]:
+    """Best-of-``repeat`` import time of ``module`` in fresh interpreters."""
+    runs = []
+    for _ in range(repeat):
+        code = _PROBE.format(path=path, module=module, forbidden=FORBIDDEN)
+        output = subprocess.run(
+            [sys.executable, "-c", code], capture_output=True, text=True, check=True
+        ).stdout
+        runs.append(json.loads(output.strip().splitlines()[-1]))
+    best = min(runs, key=lambda run: run["seconds"])
+    return {"module": module, **best}
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--budget-ms", type=float, default=150.0)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--modules", nargs="+", choices=sorted(MODULES), default=None)
+    args = parser.parse_args(argv)
+
+    failures: List[str] = []
+    for module in args.modules or MODULES:
+        result = measure(module, MODULES[module], args.repeat)
+        ms = result["seconds"] * 1e3
+        print(f"{module:45s} {ms:8.1f} ms")
+        if ms > args.budget_ms:
+            failures.append(f"{module}: {ms:.1f} ms exceeds {args.budget_ms:.0f} ms")
+        if result["loaded"]:
+            failures.append(f"{module}: imports {', '.join(result['loaded'])}")
+        if result["cwd_changed"]:
+            failures.append(f"{module}: changes the working directory")
+
+    for failure in failures:
+        print(f"FAIL {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
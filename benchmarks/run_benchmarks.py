@@ -0,0 +1,230 @@
+"""Benchmarks for the portfolioConstruction hot paths.
+
+Generates synthetic return, factor, yield, spread and price panels at the
+requested scales, times each case and records its peak traced memory,
+and writes the results as JSON.  Passing ``--baseline`` compares the run
+with an earlier results file and exits with status 1 when any case got
+slower than the tolerance allows.
+
+Examples
+--------
+Record a baseline, then check a later change against it::
+
+    python benchmarks/run_benchmarks.py --assets 100 1000 --dates 250 2500 \\
+        --output benchmarks/baseline.json
+    python benchmarks/run_benchmarks.py --assets 100 1000 --dates 250 2500 \\
+        --output results.json --baseline benchmarks/baseline.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import datetime
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+from typing import Callable, Dict, List, NamedTuple, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from portfolioConstruction.alternatives_selection import select_alternatives  # noqa: E402
+from portfolioConstruction.asset_allocation_ml import (  # noqa: E402
+    mean_variance_weights,
+    predict_returns,
+)
+from portfolioConstruction.barra_equity_selector import select_equities  # noqa: E402
+from portfolioConstruction.fixed_income_selection import select_fixed_income  # noqa: E402
+from portfolioConstruction.memoize import configure_cache  # noqa: E402
+from portfolioConstruction.risk_management import evaluate_risk  # noqa: E402
+
+N_FACTORS = 5
+
+
+class Panels(NamedTuple):
+    returns: pd.DataFrame
+    factors: pd.DataFrame
+    yields: pd.DataFrame
+    spreads: pd.DataFrame
+    prices: pd.DataFrame
+    weights: np.ndarray
+
+
+def make_panels(n_assets: int, n_dates: int, seed: int = 0) -> Panels:
+    """Synthetic panels with a factor structure in the returns."""
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range("2000-01-03", periods=n_dates)
+    assets = [f"A{i:05d}" for i in range(n_assets)]
+
+    factors = rng.normal(0.0003, 0.01, (n_dates, N_FACTORS))
+    exposures = rng.normal(0.0, 1.0, (N_FACTORS, n_assets))
+    returns = factors @ exposures + rng.normal(0.0, 0.02, (n_dates, n_assets))
+    yields = 0.03 + np.cumsum(rng.normal(0.0, 0.0005, (n_dates, n_assets)), axis=0)
+    spreads = np.abs(0.01 + np.cumsum(rng.normal(0.0, 0.0003, (n_dates, n_assets)), axis=0))
+    prices = 100.0 * np.exp(np.cumsum(rng.normal(0.0002, 0.015, (n_dates, n_assets)), axis=0))
+
+    def frame(values: np.ndarray, columns=assets) -> pd.DataFrame:
+        return pd.DataFrame(values, index=dates, columns=columns)
+
+    return Panels(
+        returns=frame(returns),
+        factors=frame(factors, [f"F{k}" for k in range(N_FACTORS)]),
+        yields=frame(yields),
+        spreads=frame(spreads),
+        prices=frame(prices),
+        weights=np.full(n_assets, 1.0 / n_assets),
+    )
+
+
+def _select_equities(p: Panels):
+    mu = p.returns.mean()
+    return select_equities(p.returns, p.factors, mu, p.factors.cov(), top_n=10)
+
+
+def _allocate(p: Panels):
+    mu, cov = predict_returns(p.returns, p.factors)
+    return mean_variance_weights(mu, cov)
+
+
+def _evaluate_risk(p: Panels):
+    return evaluate_risk(
+        p.weights, p.returns, target_volatility=0.1, leverage_limit=1.0
+    )
+
+
+CASES: Dict[str, Callable[[Panels], object]] = {
+    "select_equities": _select_equities,
+    "predict_returns+mean_variance_weights": _allocate,
+    "evaluate_risk": _evaluate_risk,
+    "select_fixed_income": lambda p: select_fixed_income(p.yields, p.spreads, top_n=10),
+    "select_alternatives": lambda p: select_alternatives(p.prices, window=60, top_n=5),
+}
+
+
+def time_case(func: Callable[[Panels], object], panels: Panels, repeat: int) -> Dict[str, float]:
+    """Wall times over ``repeat`` runs and the peak traced memory of one run."""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(panels)
+        times.append(time.perf_counter() - start)
+
+    # Memory is measured in a separate run as tracing slows allocation.
+    tracemalloc.start()
+    try:
+        func(panels)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {
+        "min_s": min(times),
+        "median_s": statistics.median(times),
+        "repeats": repeat,
+        "peak_mb": peak / 1024**2,
+    }
+
+
+def run(
+    assets: Sequence[int],
+    dates: Sequence[int],
+    cases: Optional[Sequence[str]] = None,
+    repeat: int = 3,
+    seed: int = 0,
+) -> Dict[str, object]:
+    cases = list(cases or CASES)
+    # Time the computations themselves, not hits in the estimator cache.
+    configure_cache(enabled=False)
+    results: List[Dict[str, object]] = []
+    for n_dates in dates:
+        for n_assets in assets:
+            panels = make_panels(n_assets, n_dates, seed)
+            for case in cases:
+                row = {"case": case, "n_assets": n_assets, "n_dates": n_dates}
+                row.update(time_case(CASES[case], panels, repeat))
+                results.append(row)
+                print(
+                    f"{case:40s} {n_assets:>6d} x {n_dates:<6d} "
+                    f"{row['median_s'] * 1e3:10.2f} ms {row['peak_mb']:10.1f} MB",
+                    flush=True,
+                )
+            del panels
+    return {
+        "meta": {
+            "created": datetime.datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "pandas": pd.__version__,
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+        },
+        "results": results,
+    }
+
+
+def compare(
+    current: Dict[str, object], baseline: Dict[str, object], tolerance: float
+) -> List[Dict[str, object]]:
+    """Cases whose median time exceeds the baseline by more than ``tolerance``."""
+
+    def key(row):
+        return (row["case"], row["n_assets"], row["n_dates"])
+
+    previous = {key(row): row for row in baseline["results"]}
+    regressions = []
+    for row in current["results"]:
+        base = previous.get(key(row))
+        if base is None:
+            continue
+        ratio = row["median_s"] / base["median_s"] if base["median_s"] > 0 else 1.0
+        if ratio > 1.0 + tolerance:
+            regressions.append({**dict(zip(("case", "n_assets", "n_dates"), key(row))),
+                                "baseline_s": base["median_s"],
+                                "median_s": row["median_s"],
+                                "ratio": ratio})
+    return regressions
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--assets", type=int, nargs="+", default=[100, 1000])
+    parser.add_argument("--dates", type=int, nargs="+", default=[250, 2500])
+    parser.add_argument("--cases", nargs="+", choices=sorted(CASES), default=None)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default="benchmark_results.json")
+    parser.add_argument("--baseline", default=None, help="results file to compare against")
+    parser.add_argument(
+        "--tolerance", type=float, default=0.25,
+        help="allowed slowdown relative to the baseline, by default 0.25 (25%%)",
+    )
+    args = parser.parse_args(argv)
+
+    current = run(args.assets, args.dates, args.cases, args.repeat, args.seed)
+    with open(args.output, "w") as f:
+        json.dump(current, f, indent=2)
+    print(f"results written to {args.output}")
+
+    if args.baseline is None:
+        return 0
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    regressions = compare(current, baseline, args.tolerance)
+    for row in regressions:
+        print(
+            f"REGRESSION {row['case']} {row['n_assets']} x {row['n_dates']}: "
+            f"{row['baseline_s'] * 1e3:.2f} ms -> {row['median_s'] * 1e3:.2f} ms "
+            f"({row['ratio']:.2f}x)"
+        )
+    if not regressions:
+        print(f"no regressions beyond {args.tolerance:.0%} of {args.baseline}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
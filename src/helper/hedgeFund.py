@@ -1,10 +1,19 @@
-import pandas as pd 
+import numpy as np
+import pandas as pd
+
+# Factor columns used by each model, named as in HW_Factors.xlsx
+FACTOR_MODELS = {
+    'CAPM': ['Mkt-RF'],
+    'FF4': ['Mkt-RF', 'SMB', 'HML', 'Mom'],
+    'FF5': ['Mkt-RF', 'SMB', 'HML', 'RMW', 'CMA'],
+}
 
 
 class HedgeFund:
     def __init__(self, name: str, *args, **kwargs):
         self.name = name
-        self.beta = self.calculate_beta()
+        self.beta = None
+        self.betas = None
         self.alpha = None
         self.R_squared = None
         self.t_stat = None
@@ -16,12 +25,255 @@ class HedgeFund:
     
     def calculate_beta(self, HF_returns: pd.DataFrame, RF_returns: pd.DataFrame):
         beta = HF_returns.cov(RF_returns) / RF_returns.var()
+        self.beta = beta
         return beta
-    
-    def calculate_FF4(self, HF_returns: pd.DataFrame, Emp_factors: pd.DataFrame):
-        pass    
 
-    def calculate_FF5(self, HF_returns: pd.DataFrame, Emp_factors: pd.DataFrame):
-        pass
+    def calculate_CAPM(self, HF_returns: pd.Series, Emp_factors: pd.DataFrame):
+        return self._fit('CAPM', HF_returns, Emp_factors)
+
+    def calculate_FF4(self, HF_returns: pd.Series, Emp_factors: pd.DataFrame):
+        return self._fit('FF4', HF_returns, Emp_factors)
+
+    def calculate_FF5(self, HF_returns: pd.Series, Emp_factors: pd.DataFrame):
+        return self._fit('FF5', HF_returns, Emp_factors)
+
+    def _fit(self, model: str, HF_returns: pd.Series, Emp_factors: pd.DataFrame):
+        # HF_returns are excess returns aligned row by row with Emp_factors
+        results = factor_regressions(
+            pd.DataFrame({self.name: np.asarray(HF_returns, dtype=float)}),
+            Emp_factors,
+            models={model: FACTOR_MODELS[model]},
+            conditional=False,
+        )
+        row = results.loc[(model, 'all', self.name)]
+        factors = FACTOR_MODELS[model]
+        self.alpha = row['alpha']
+        self.betas = row[[f'beta_{f}' for f in factors]].set_axis(factors)
+        self.beta = self.betas['Mkt-RF']
+        self.t_stat = row['t_alpha']
+        self.R_squared = row['r_squared']
+        return row.dropna()
+
+    def calculate_rolling(self, HF_returns: pd.Series, Emp_factors: pd.DataFrame,
+                          model: str = 'CAPM', window: int = 36, halflife: float = None):
+        # Rolling (or exponentially weighted) alpha/betas for this fund only
+        results = rolling_factor_regressions(
+            pd.DataFrame({self.name: HF_returns}), Emp_factors,
+            factors=FACTOR_MODELS[model], window=window, halflife=halflife,
+        )
+        return results.xs(self.name, level='fund')
+
+
+def _ols_many(X: np.ndarray, Y: np.ndarray):
+    """OLS of every column of Y on X (which includes the constant).
+
+    Funds with missing returns are grouped by their pattern of available
+    months and each group is solved with one factorisation of X.
+    Returns coefficients, standard errors (both p x M), R^2 and the number
+    of observations per fund.
+    """
+    n_params = X.shape[1]
+    n_funds = Y.shape[1]
+    coef = np.full((n_params, n_funds), np.nan)
+    std_err = np.full((n_params, n_funds), np.nan)
+    r_squared = np.full(n_funds, np.nan)
+
+    observed = np.isfinite(Y) & np.isfinite(X).all(axis=1)[:, None]
+    n_obs = observed.sum(axis=0)
+    patterns, groups = np.unique(observed.T, axis=0, return_inverse=True)
+    groups = np.asarray(groups).ravel()
+    for g, rows in enumerate(patterns):
+        n = rows.sum()
+        if n <= n_params:
+            continue
+        cols = np.flatnonzero(groups == g)
+        Xg = X[rows]
+        Yg = Y[np.ix_(rows, cols)]
+        xtx_inv = np.linalg.pinv(Xg.T @ Xg)
+        beta = xtx_inv @ (Xg.T @ Yg)
+        resid = Yg - Xg @ beta
+        rss = (resid * resid).sum(axis=0)
+        centred = Yg - Yg.mean(axis=0)
+        tss = (centred * centred).sum(axis=0)
+        sigma2 = rss / (n - n_params)
+        coef[:, cols] = beta
+        std_err[:, cols] = np.sqrt(np.outer(np.diag(xtx_inv), sigma2))
+        with np.errstate(invalid='ignore', divide='ignore'):
+            r_squared[cols] = 1.0 - rss / tss
+    return coef, std_err, r_squared, n_obs
+
+
+def factor_regressions(HF_excess_returns: pd.DataFrame, Emp_factors: pd.DataFrame,
+                       models: dict = None, market: pd.Series = None,
+                       conditional: bool = True) -> pd.DataFrame:
+    """CAPM / Fama-French regressions for all hedge funds at once.
+
+    Every fund is regressed on the same factor matrix, so each model (and
+    market regime) needs a single least-squares solve for all funds.
+
+    Parameters
+    ----------
+    HF_excess_returns : DataFrame
+        Hedge fund returns in excess of the risk-free rate, funds in
+        columns.  Rows are matched by position with ``Emp_factors``.
+    Emp_factors : DataFrame
+        Factor returns with columns such as 'Mkt-RF', 'SMB', 'HML', 'Mom'
+        and 'RF'.
+    models : dict, optional
+        Model name -> list of factor columns.  Defaults to the models in
+        ``FACTOR_MODELS`` whose factors are all available.
+    market : Series, optional
+        Market return used to split up and down months.  Defaults to
+        'Mkt-RF' + 'RF' (or 'Mkt-RF' without an 'RF' column).
+    conditional : bool
+        Also fit each model on up-market (market > 0) and down-market
+        (market < 0) months.
+
+    Returns
+    -------
+    DataFrame
+        Indexed by (model, regime, fund) with alpha, beta_<factor>,
+        t_alpha, t_<factor>, r_squared and n_obs columns.
+    """
+    if len(HF_excess_returns) != len(Emp_factors):
+        raise ValueError("HF_excess_returns and Emp_factors must have the same number of rows")
+    if models is None:
+        models = {name: factors for name, factors in FACTOR_MODELS.items()
+                  if all(f in Emp_factors.columns for f in factors)}
+
+    Y = HF_excess_returns.to_numpy(dtype=float)
+    funds = HF_excess_returns.columns
+    regimes = {'all': np.ones(len(Y), dtype=bool)}
+    if conditional:
+        if market is None:
+            market = Emp_factors['Mkt-RF']
+            if 'RF' in Emp_factors.columns:
+                market = market + Emp_factors['RF']
+        market = np.asarray(market, dtype=float)
+        regimes['up'] = market > 0
+        regimes['down'] = market < 0
+
+    all_factors = list(dict.fromkeys(f for factors in models.values() for f in factors))
+    columns = (['alpha'] + [f'beta_{f}' for f in all_factors]
+               + ['t_alpha'] + [f't_{f}' for f in all_factors] + ['r_squared', 'n_obs'])
+    frames = []
+    for model, factors in models.items():
+        X_full = np.column_stack([np.ones(len(Y)), Emp_factors[factors].to_numpy(dtype=float)])
+        for regime, rows in regimes.items():
+            coef, std_err, r_squared, n_obs = _ols_many(X_full[rows], Y[rows])
+            with np.errstate(invalid='ignore', divide='ignore'):
+                t_values = coef / std_err
+            table = pd.DataFrame(np.nan, index=funds, columns=columns)
+            table['alpha'] = coef[0]
+            table['t_alpha'] = t_values[0]
+            for i, factor in enumerate(factors, start=1):
+                table[f'beta_{factor}'] = coef[i]
+                table[f't_{factor}'] = t_values[i]
+            table['r_squared'] = r_squared
+            table['n_obs'] = n_obs
+            table.index = pd.MultiIndex.from_product([[model], [regime], funds],
+                                                     names=['model', 'regime', 'fund'])
+            frames.append(table)
+    return pd.concat(frames)
+
+
+def rolling_factor_regressions(HF_excess_returns: pd.DataFrame, Emp_factors: pd.DataFrame,
+                               factors: list = None, window: int = 36,
+                               halflife: float = None, min_periods: int = None) -> pd.DataFrame:
+    """Rolling alpha, betas and R^2 for every fund.
+
+    The regression sufficient statistics (X'X, X'y, sum y, sum y^2 and the
+    observation count) are kept per fund and updated as each month enters
+    and, for a fixed window, leaves; no window is refitted from scratch.
+    With ``halflife`` the statistics are instead decayed by
+    ``0.5 ** (1 / halflife)`` each month, giving exponentially weighted
+    regressions over the whole history.  Missing fund returns simply skip
+    the update for that fund.
+
+    Parameters
+    ----------
+    HF_excess_returns : DataFrame
+        Hedge fund excess returns, funds in columns, dates in rows.  Rows
+        are matched by position with ``Emp_factors``.
+    Emp_factors : DataFrame
+        Factor returns.
+    factors : list, optional
+        Factor columns to regress on, by default the CAPM market factor.
+    window : int
+        Number of months in each rolling window (ignored with ``halflife``).
+    halflife : float, optional
+        Half-life in months for exponentially weighted regressions.
+    min_periods : int, optional
+        Minimum number of observations before estimates are reported, by
+        default the window length (number of regressors + 1 when
+        exponentially weighted).
+
+    Returns
+    -------
+    DataFrame
+        Indexed by (date, fund) with alpha, beta_<factor>, r_squared and
+        n_obs columns.
+    """
+    if len(HF_excess_returns) != len(Emp_factors):
+        raise ValueError("HF_excess_returns and Emp_factors must have the same number of rows")
+    if factors is None:
+        factors = FACTOR_MODELS['CAPM']
+    X = np.column_stack([np.ones(len(Emp_factors)), Emp_factors[factors].to_numpy(dtype=float)])
+    Y = HF_excess_returns.to_numpy(dtype=float)
+    n_dates, n_funds = Y.shape
+    n_params = X.shape[1]
+    if min_periods is None:
+        min_periods = n_params + 1 if halflife is not None else window
+    decay = 0.5 ** (1.0 / halflife) if halflife is not None else 1.0
+
+    observed = np.isfinite(Y) & np.isfinite(X).all(axis=1)[:, None]
+    X_obs = np.where(np.isfinite(X), X, 0.0)
+    Y_obs = np.where(observed, Y, 0.0)
+
+    s_xx = np.zeros((n_funds, n_params, n_params))
+    s_xy = np.zeros((n_funds, n_params))
+    s_y = np.zeros(n_funds)
+    s_yy = np.zeros(n_funds)
+    count = np.zeros(n_funds, dtype=int)
+
+    def update(t, sign):
+        m = observed[t].astype(float) * sign
+        x, y = X_obs[t], Y_obs[t]
+        s_xx[:] += m[:, None, None] * np.outer(x, x)
+        s_xy[:] += (m * y)[:, None] * x
+        s_y[:] += m * y
+        s_yy[:] += m * y * y
+        count[:] += observed[t].astype(int) * int(sign)
+
+    results = np.full((n_dates, n_funds, n_params + 2), np.nan)
+    for t in range(n_dates):
+        if halflife is not None:
+            s_xx *= decay
+            s_xy *= decay
+            s_y *= decay
+            s_yy *= decay
+        elif t >= window:
+            update(t - window, -1.0)
+        update(t, 1.0)
 
+        ready = count >= min_periods
+        if not ready.any():
+            continue
+        try:
+            coef = np.linalg.solve(s_xx[ready], s_xy[ready][..., None])[..., 0]
+        except np.linalg.LinAlgError:
+            coef = (np.linalg.pinv(s_xx[ready]) @ s_xy[ready][..., None])[..., 0]
+        weight = s_xx[ready, 0, 0]
+        rss = (s_yy[ready] - 2.0 * (coef * s_xy[ready]).sum(axis=1)
+               + np.einsum('fi,fij,fj->f', coef, s_xx[ready], coef))
+        tss = s_yy[ready] - s_y[ready] ** 2 / weight
+        with np.errstate(invalid='ignore', divide='ignore'):
+            r_squared = 1.0 - np.maximum(rss, 0.0) / tss
+        results[t, ready, :n_params] = coef
+        results[t, ready, n_params] = r_squared
+        results[t, :, n_params + 1] = count
 
+    columns = ['alpha'] + [f'beta_{f}' for f in factors] + ['r_squared', 'n_obs']
+    index = pd.MultiIndex.from_product([HF_excess_returns.index, HF_excess_returns.columns],
+                                       names=['date', 'fund'])
+    return pd.DataFrame(results.reshape(n_dates * n_funds, -1), index=index, columns=columns)
@@ -1,9 +1,24 @@
+# Plotting libraries and openpyxl are not imported here: pandas loads the
+# Excel engine itself on the first read_excel call, so importing helper
+# stays cheap for batch jobs and worker processes.
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
 import os
-import openpyxl
+import hashlib
+import pickle
+import shutil
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+try:
+    from portfolioConstruction.instrumentation import instrument
+except ImportError:
+    # Without the package on the path (e.g. notebooks that only add
+    # src/helper) loading simply isn't instrumented
+    def instrument(func=None, *, name=None):
+        return func if func is not None else (lambda function: function)
+
+CACHE_FOLDER = '.cache'
+CACHE_VERSION = 1
 # Load the data
 def change_to_inputFolder():
     # Get the directory of the script file
@@ -18,13 +33,29 @@ def change_to_inputFolder():
     # input_path = os.path.join(current_path, 'input')
     # os.chdir()
 
-def load_data(file_name: str, start_row: int = 0):
+@instrument(name='helper.load_data')
+def load_data(file_name: str, start_row: int = 0, sheet_name=0,
+              use_cache: bool = True, mmap: bool = False, validate: str = 'mtime'):
+    """Load an input file from the ``input`` folder.
+
+    Excel sheets are parsed once and then cached as one ``.npy`` file per
+    column under ``input/.cache``, keyed by file, sheet and ``start_row``.
+    Later calls read the cache instead of parsing the workbook again.
+    The cache is rebuilt when the source file changes: ``validate='mtime'``
+    compares size and modification time, ``validate='hash'`` compares a
+    SHA-256 of the file contents.  With ``mmap=True`` numeric columns are
+    memory-mapped (read-only) rather than read into memory.  Requests for
+    several sheets at once (``sheet_name=None`` or a list), which return a
+    dict of DataFrames, are read without the cache.
+    """
     target_folder = change_to_inputFolder()
     file_path = os.path.join(target_folder, file_name)
     
     if file_name.endswith('.xlsx'):
+        if use_cache and isinstance(sheet_name, (str, int)):
+            return _load_excel_cached(file_path, sheet_name, start_row, mmap, validate)
         # Use pd.read_excel() for Excel files
-        data = pd.read_excel(file_path, skiprows=start_row)
+        data = pd.read_excel(file_path, sheet_name=sheet_name, skiprows=start_row)
     elif file_name.endswith('.csv'):
         # Use pd.read_csv() for CSV files, with error handling
         try:
@@ -37,6 +68,158 @@ def load_data(file_name: str, start_row: int = 0):
     
     return data
 
+@instrument(name='helper.load_many')
+def load_many(requests, max_workers=None, use_processes: bool = True, **load_kwargs):
+    """Load several input files concurrently.
+
+    ``requests`` is a list of file names or ``(file_name, start_row)`` /
+    ``(file_name, start_row, sheet_name)`` tuples, e.g.
+    ``['HW_World.xlsx', ('HW_DJIA_Prices.xlsx', 4)]``.  Each request is
+    passed to ``load_data`` (so caching and the CSV encoding fallback
+    apply) on a process pool, since parsing workbooks is CPU-bound.
+    Extra keyword arguments are forwarded to ``load_data``.
+
+    Returns a dict mapping each request to its DataFrame.  List requests
+    (and list arguments such as several sheet names) are keyed as tuples,
+    and duplicate requests are loaded once.
+    """
+    unique = {}
+    for request in requests:
+        unique.setdefault(_request_key(request), request)
+    if not unique:
+        return {}
+    if max_workers is None:
+        max_workers = min(len(unique), os.cpu_count() or 1)
+
+    def arguments(request):
+        if isinstance(request, str):
+            return (request,)
+        return tuple(request)
+
+    if max_workers <= 1 or len(unique) == 1:
+        return {key: load_data(*arguments(r), **load_kwargs) for key, r in unique.items()}
+
+    pool_class = ProcessPoolExecutor if use_processes else ThreadPoolExecutor
+    with pool_class(max_workers=max_workers) as pool:
+        futures = {key: pool.submit(load_data, *arguments(r), **load_kwargs)
+                   for key, r in unique.items()}
+        return {key: future.result() for key, future in futures.items()}
+
+def _request_key(request):
+    # Lists are unhashable; turn them (and nested lists) into tuples
+    if isinstance(request, (list, tuple)):
+        return tuple(_request_key(part) for part in request)
+    return request
+
+def clear_cache():
+    # Remove every cached sheet; they are rebuilt on the next load_data call
+    shutil.rmtree(os.path.join(change_to_inputFolder(), CACHE_FOLDER), ignore_errors=True)
+
+def _source_signature(file_path: str, validate: str):
+    stat = os.stat(file_path)
+    if validate == 'mtime':
+        return (stat.st_size, stat.st_mtime_ns)
+    if validate == 'hash':
+        digest = hashlib.sha256()
+        with open(file_path, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                digest.update(block)
+        return (stat.st_size, digest.hexdigest())
+    raise ValueError(f"Unknown cache validation mode: {validate}")
+
+def _cache_path(file_path: str, sheet_name, start_row: int):
+    stem = os.path.basename(file_path)
+    key = f"{stem}__{sheet_name}__{start_row}"
+    return os.path.join(os.path.dirname(file_path), CACHE_FOLDER, key)
+
+def _load_excel_cached(file_path: str, sheet_name, start_row: int, mmap: bool, validate: str):
+    cache_dir = _cache_path(file_path, sheet_name, start_row)
+    signature = _source_signature(file_path, validate)
+    data = _read_cache(cache_dir, signature, mmap)
+    if data is not None:
+        return data
+
+    data = pd.read_excel(file_path, sheet_name=sheet_name, skiprows=start_row)
+    try:
+        _write_cache(cache_dir, data, signature)
+    except OSError:
+        # A read-only input folder just means no cache
+        return data
+    # Re-read so that the first call returns the same layout as later ones
+    cached = _read_cache(cache_dir, signature, mmap) if mmap else None
+    return cached if cached is not None else data
+
+def _write_cache(cache_dir: str, data: pd.DataFrame, signature):
+    tmp_dir = f"{cache_dir}.tmp{os.getpid()}"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+    try:
+        _write_cache_files(tmp_dir, data, signature)
+        shutil.rmtree(cache_dir, ignore_errors=True)
+        try:
+            os.replace(tmp_dir, cache_dir)
+        except OSError:
+            # Another process wrote the same sheet first; keep its copy
+            if not os.path.isdir(cache_dir):
+                raise
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+def _write_cache_files(tmp_dir: str, data: pd.DataFrame, signature):
+    kinds = []
+    object_columns = []
+    for i in range(data.shape[1]):
+        values = data.iloc[:, i].to_numpy()
+        # Numeric, boolean and naive datetime columns go to their own .npy
+        if values.dtype.kind in 'biufcmM':
+            np.save(os.path.join(tmp_dir, f"col_{i}.npy"), values)
+            kinds.append('npy')
+        else:
+            object_columns.append(i)
+            kinds.append('object')
+    if object_columns:
+        data.iloc[:, object_columns].to_pickle(os.path.join(tmp_dir, 'objects.pkl'))
+
+    meta = {
+        'version': CACHE_VERSION,
+        'signature': signature,
+        'columns': data.columns,
+        'index': data.index,
+        'kinds': kinds,
+    }
+    with open(os.path.join(tmp_dir, 'meta.pkl'), 'wb') as f:
+        pickle.dump(meta, f)
+
+def _read_cache(cache_dir: str, signature, mmap: bool):
+    meta_path = os.path.join(cache_dir, 'meta.pkl')
+    try:
+        with open(meta_path, 'rb') as f:
+            meta = pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError):
+        return None
+    if meta.get('version') != CACHE_VERSION or meta.get('signature') != signature:
+        return None
+
+    try:
+        objects = None
+        if 'object' in meta['kinds']:
+            objects = pd.read_pickle(os.path.join(cache_dir, 'objects.pkl'))
+        columns = {}
+        position = 0
+        for i, kind in enumerate(meta['kinds']):
+            if kind == 'npy':
+                columns[i] = np.load(os.path.join(cache_dir, f"col_{i}.npy"),
+                                     mmap_mode='r' if mmap else None)
+            else:
+                columns[i] = objects.iloc[:, position].to_numpy()
+                position += 1
+    except (OSError, ValueError, EOFError, pickle.UnpicklingError):
+        # The cache is being rebuilt by another process; parse the workbook
+        return None
+    data = pd.DataFrame(columns, index=meta['index'], copy=False)
+    data.columns = meta['columns']
+    return data
+
 def output_print():
     return "this is helper"
 
@@ -0,0 +1,334 @@
+import json
+import os
+import pickle
+import shutil
+
+import numpy as np
+import pandas as pd
+
+STORE_VERSION = 1
+
+
+def output_folder():
+    # <repo>/output, next to the input folder used by helper.load_data
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    return os.path.join(os.path.dirname(os.path.dirname(script_dir)), 'output')
+
+
+class ResultsStore:
+    """Columnar store for backtest and regression results.
+
+    Every table is a folder holding a ``meta.json`` and one sub-folder per
+    appended chunk.  A chunk stores each index level and each column as its
+    own ``.npy`` file: numeric, boolean and datetime values keep their
+    dtype, and text is stored as integer codes with the labels kept in the
+    metadata.  Nothing is pickled, so opening a table only parses the small
+    JSON file, and reads memory-map just the chunks and columns asked for.
+
+    Tables can be appended to (for example one chunk per backtest run) and
+    read back partially by run, by a range of the first index level
+    (usually dates) and by labels of any index level::
+
+        store = ResultsStore()
+        store.write('Part3_BT_performance', BT_perform_df)
+        store.append('nav', result.nav, run='2024-06')
+        store.read('nav', columns=['value', 'tangent'], start='2010-01-01')
+    """
+
+    def __init__(self, root: str = None):
+        self.root = root if root is not None else os.path.join(output_folder(), 'results')
+        os.makedirs(self.root, exist_ok=True)
+
+    def tables(self):
+        return sorted(name for name in os.listdir(self.root)
+                      if os.path.isfile(os.path.join(self.root, name, 'meta.json')))
+
+    def info(self, name: str):
+        """Metadata of a table: index levels, columns, dtypes and chunks."""
+        with open(os.path.join(self._table_path(name), 'meta.json')) as f:
+            return json.load(f)
+
+    def runs(self, name: str):
+        return list(dict.fromkeys(chunk['run'] for chunk in self.info(name)['chunks']))
+
+    def delete(self, name: str):
+        shutil.rmtree(self._table_path(name), ignore_errors=True)
+
+    def write(self, name: str, data, run: str = None):
+        """Store ``data`` as table ``name``, replacing any existing table."""
+        self.delete(name)
+        self.append(name, data, run=run)
+
+    def append(self, name: str, data, run: str = None):
+        """Add ``data`` as a new chunk of table ``name`` (created if needed).
+
+        The index level names and the columns must match the table.
+        ``run`` labels the chunk so that it can be selected in ``read``.
+        """
+        data = pd.DataFrame(data)
+        table_path = self._table_path(name)
+        levels = [str(n) if n is not None else f'level_{i}'
+                  for i, n in enumerate(data.index.names)]
+        columns = [_column_label(c) for c in data.columns]
+
+        meta = self.info(name) if os.path.exists(os.path.join(table_path, 'meta.json')) else None
+        if meta is None:
+            meta = {
+                'version': STORE_VERSION,
+                'levels': levels,
+                'level_names': [_json_label(n) for n in data.index.names],
+                'columns': columns,
+                'column_names': [_json_label(c) for c in data.columns],
+                'chunks': [],
+            }
+        elif meta['levels'] != levels or meta['columns'] != columns:
+            raise ValueError(f"Index levels or columns do not match table '{name}'")
+
+        chunk_id = max((c['id'] for c in meta['chunks']), default=-1) + 1
+        chunk_dir = f'chunk_{chunk_id:05d}'
+        tmp_dir = os.path.join(table_path, f'{chunk_dir}.tmp{os.getpid()}')
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        os.makedirs(tmp_dir)
+
+        fields = {}
+        for i, level in enumerate(levels):
+            fields[f'index_{i}'] = _save_field(tmp_dir, f'index_{i}',
+                                               data.index.get_level_values(i))
+        for i in range(data.shape[1]):
+            fields[f'col_{i}'] = _save_field(tmp_dir, f'col_{i}', data.iloc[:, i])
+        os.replace(tmp_dir, os.path.join(table_path, chunk_dir))
+
+        chunk = {'id': chunk_id, 'path': chunk_dir, 'run': run,
+                 'rows': len(data), 'fields': fields}
+        first = data.index.get_level_values(0)
+        if len(first) and first.is_monotonic_increasing and first.dtype.kind in 'iufM':
+            # Lets date-range reads skip whole chunks
+            chunk['first'] = _json_label(first[0])
+            chunk['last'] = _json_label(first[-1])
+        meta['chunks'].append(chunk)
+        _write_meta(table_path, meta)
+
+    def read(self, name: str, columns=None, start=None, end=None, where: dict = None,
+             runs=None, mmap: bool = True):
+        """Read all or part of a table.
+
+        Parameters
+        ----------
+        columns : list, optional
+            Columns to load; others are never opened.
+        start, end : optional
+            Inclusive bounds on the first index level (e.g. dates).
+        where : dict, optional
+            Index level name -> list of labels to keep, e.g.
+            ``{'fund': ['HFRI4ELS']}``.  Unnamed levels are called
+            ``level_0``, ``level_1``, ...
+        runs : str or list, optional
+            Only read chunks appended with these run labels.
+        mmap : bool
+            Memory-map numeric columns instead of reading them; rows are
+            only copied when a filter selects part of a chunk.
+        """
+        meta = self.info(name)
+        table_path = self._table_path(name)
+        levels = meta['levels']
+        if columns is None:
+            positions = list(range(len(meta['columns'])))
+        else:
+            lookup = {label: i for i, label in enumerate(meta['columns'])}
+            try:
+                positions = [lookup[_column_label(c)] for c in columns]
+            except KeyError as e:
+                raise KeyError(f"Column {e.args[0]} not in table '{name}'") from None
+        where = dict(where or {})
+        unknown = set(where) - set(levels)
+        if unknown:
+            raise KeyError(f"Unknown index levels {sorted(unknown)} for table '{name}'")
+        if isinstance(runs, str) or runs is None:
+            runs = None if runs is None else [runs]
+
+        pieces = []
+        for chunk in meta['chunks']:
+            if runs is not None and chunk['run'] not in runs:
+                continue
+            if not _chunk_in_range(chunk, start, end):
+                continue
+            chunk_path = os.path.join(table_path, chunk['path'])
+            fields = chunk['fields']
+            index = [_load_field(chunk_path, f'index_{i}', fields[f'index_{i}'], mmap)
+                     for i in range(len(levels))]
+
+            rows = None
+            if start is not None or end is not None:
+                rows = _range_mask(index[0], start, end)
+            for level, labels in where.items():
+                mask = _isin(index[levels.index(level)], labels)
+                rows = mask if rows is None else rows & mask
+            if rows is not None and not rows.any():
+                continue
+
+            values = {}
+            for out, i in enumerate(positions):
+                values[out] = _load_field(chunk_path, f'col_{i}', fields[f'col_{i}'], mmap)
+            if rows is not None:
+                index = [level[rows] for level in index]
+                values = {k: v[rows] for k, v in values.items()}
+            index = [_as_column(level, fields[f'index_{i}']) for i, level in enumerate(index)]
+            values = {out: _as_column(values[out], fields[f'col_{i}'])
+                      for out, i in enumerate(positions)}
+            pieces.append(_frame(index, levels, values))
+
+        if not pieces:
+            empty = [_load_empty(levels)] if levels else []
+            frame = pd.DataFrame(index=empty[0] if empty else None,
+                                 columns=range(len(positions)))
+        else:
+            frame = pieces[0] if len(pieces) == 1 else pd.concat(pieces)
+        names = meta['column_names']
+        frame.columns = pd.Index([_from_json_label(names[i]) for i in positions])
+        frame.index.names = [_from_json_label(n) for n in meta['level_names']]
+        return frame
+
+    def _table_path(self, name: str):
+        if not name or os.sep in name or name.startswith('.'):
+            raise ValueError(f"Invalid table name: {name!r}")
+        return os.path.join(self.root, name)
+
+
+def import_pickles(store: ResultsStore = None, folder: str = None):
+    """Copy the DataFrames pickled in ``output/`` (Part1_CAPM.pickle, ...)
+    into the store, one table per file.  Returns the names of the tables."""
+    store = store if store is not None else ResultsStore()
+    folder = folder if folder is not None else output_folder()
+    imported = []
+    for file_name in sorted(os.listdir(folder)):
+        if not file_name.endswith('.pickle'):
+            continue
+        with open(os.path.join(folder, file_name), 'rb') as f:
+            data = pickle.load(f)
+        if isinstance(data, (pd.DataFrame, pd.Series)):
+            name = file_name[:-len('.pickle')]
+            store.write(name, data)
+            imported.append(name)
+    return imported
+
+
+def _write_meta(table_path: str, meta: dict):
+    tmp_path = os.path.join(table_path, f'meta.json.tmp{os.getpid()}')
+    with open(tmp_path, 'w') as f:
+        json.dump(meta, f)
+    os.replace(tmp_path, os.path.join(table_path, 'meta.json'))
+
+
+def _column_label(label):
+    # Key used to match columns across appends
+    return json.dumps(_json_label(label))
+
+
+def _json_label(label):
+    if isinstance(label, tuple):
+        return {'tuple': [_json_label(x) for x in label]}
+    if isinstance(label, (pd.Timestamp, np.datetime64)):
+        return {'timestamp': pd.Timestamp(label).isoformat()}
+    if isinstance(label, np.generic):
+        return label.item()
+    return label
+
+
+def _from_json_label(label):
+    if isinstance(label, dict):
+        if 'tuple' in label:
+            return tuple(_from_json_label(x) for x in label['tuple'])
+        return pd.Timestamp(label['timestamp'])
+    return label
+
+
+def _save_field(folder: str, key: str, values):
+    values = pd.Series(values)
+    if isinstance(values.dtype, pd.DatetimeTZDtype):
+        raise TypeError("Time zone aware timestamps are not supported; convert to UTC first")
+    array = values.to_numpy()
+    if array.dtype.kind in 'biufcmM':
+        np.save(os.path.join(folder, f'{key}.npy'), array)
+        return {'kind': 'array', 'dtype': array.dtype.str}
+
+    # Text: integer codes plus the labels, -1 for missing
+    codes, labels = pd.factorize(values)
+    if not all(isinstance(label, str) for label in labels):
+        raise TypeError(f"Only numeric, datetime and text values can be stored ({key})")
+    np.save(os.path.join(folder, f'{key}.npy'), codes.astype(np.int32))
+    return {'kind': 'text', 'labels': list(labels), 'dtype': str(values.dtype)}
+
+
+def _load_field(folder: str, key: str, field: dict, mmap: bool):
+    codes = np.load(os.path.join(folder, f'{key}.npy'), mmap_mode='r' if mmap else None)
+    if field['kind'] == 'array':
+        return codes
+    return pd.Categorical.from_codes(np.asarray(codes), categories=field['labels'])
+
+
+def _load_empty(levels):
+    if len(levels) == 1:
+        return pd.Index([], name=levels[0])
+    return pd.MultiIndex.from_arrays([[]] * len(levels), names=levels)
+
+
+def _frame(index, levels, values):
+    if len(levels) == 1:
+        idx = pd.Index(index[0], name=levels[0], dtype=index[0].dtype)
+    else:
+        idx = pd.MultiIndex.from_arrays(index, names=levels)
+    frame = pd.DataFrame(values, index=idx, copy=False)
+    # The constructor may infer a string dtype for object text columns
+    for key, column in values.items():
+        if frame[key].dtype != column.dtype:
+            frame[key] = frame[key].astype(column.dtype)
+    return frame
+
+
+def _as_column(values, field: dict):
+    # Text comes back with the dtype it was stored with (object or string)
+    if field['kind'] != 'text':
+        return values
+    return pd.array(np.asarray(values, dtype=object), dtype=field['dtype'])
+
+
+def _coerce_bound(values, bound):
+    if isinstance(values, np.ndarray) and values.dtype.kind == 'M':
+        return np.datetime64(pd.Timestamp(bound), 'ns').astype(values.dtype)
+    return bound
+
+
+def _range_mask(values, start, end):
+    if isinstance(values, pd.Categorical):
+        values = np.asarray(values)
+    mask = np.ones(len(values), dtype=bool)
+    if start is not None:
+        mask &= values >= _coerce_bound(values, start)
+    if end is not None:
+        mask &= values <= _coerce_bound(values, end)
+    return mask
+
+
+def _chunk_in_range(chunk: dict, start, end):
+    if 'first' not in chunk:
+        return True
+    first, last = _from_json_label(chunk['first']), _from_json_label(chunk['last'])
+    if isinstance(first, pd.Timestamp):
+        start = pd.Timestamp(start) if start is not None else None
+        end = pd.Timestamp(end) if end is not None else None
+    if start is not None and last < start:
+        return False
+    if end is not None and first > end:
+        return False
+    return True
+
+
+def _isin(values, labels):
+    if isinstance(values, pd.Categorical):
+        # Compare integer codes rather than strings
+        wanted = values.categories.get_indexer(list(labels))
+        return np.isin(values.codes, wanted[wanted >= 0])
+    labels = list(labels)
+    if values.dtype.kind == 'M':
+        labels = pd.DatetimeIndex(labels).values.astype(values.dtype)
+    return np.isin(values, labels)
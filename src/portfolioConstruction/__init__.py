@@ -1,7 +1,57 @@
-"""Portfolio construction utilities."""
+"""Portfolio construction utilities.
 
-from .barra_equity_selector import select_equities
-from .fixed_income_selection import select_fixed_income
-from .alternatives_selection import select_alternatives
+Submodules are imported on first access to one of the names below, so
+``import portfolioConstruction`` (or importing a single submodule) does
+not load the rest of the package.
+"""
 
-__all__ = ["select_equities", "select_fixed_income", "select_alternatives"]
+from __future__ import annotations
+
+import importlib
+from typing import TYPE_CHECKING
+
+_EXPORTS = {
+    "select_equities": ".barra_equity_selector",
+    "select_fixed_income": ".fixed_income_selection",
+    "select_alternatives": ".alternatives_selection",
+    "FactorCovariance": ".factor_covariance",
+    "run_backtest": ".backtest",
+    "MultiAssetPipeline": ".pipeline",
+    "LivePortfolio": ".live",
+    "Panel": ".panel",
+}
+
+if TYPE_CHECKING:
+    from .alternatives_selection import select_alternatives
+    from .backtest import run_backtest
+    from .barra_equity_selector import select_equities
+    from .factor_covariance import FactorCovariance
+    from .fixed_income_selection import select_fixed_income
+    from .live import LivePortfolio
+    from .panel import Panel
+    from .pipeline import MultiAssetPipeline
+
+
+def __getattr__(name: str):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_EXPORTS))
+
+
+__all__ = [
+    "select_equities",
+    "select_fixed_income",
+    "select_alternatives",
+    "FactorCovariance",
+    "run_backtest",
+    "MultiAssetPipeline",
+    "LivePortfolio",
+    "Panel",
+]
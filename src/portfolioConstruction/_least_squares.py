@@ -0,0 +1,154 @@
+"""Shared least-squares kernels for the portfolio construction modules.
+
+The estimators in this package regress many assets on the *same* design
+matrix.  Rather than calling :func:`numpy.linalg.lstsq` once per asset,
+the helpers below factorise the design matrix once and solve for all
+right-hand sides together.
+"""
+
+from __future__ import annotations
+
+from typing import Tuple
+
+import numpy as np
+
+
+def _solve_multi(X: np.ndarray, Y: np.ndarray) -> np.ndarray:
+    """Solve ``X b = y`` for every column of ``Y`` with one factorisation.
+
+    A reduced QR decomposition is used when ``X`` has full column rank;
+    otherwise we fall back to the minimum-norm SVD solution, matching the
+    behaviour of :func:`numpy.linalg.lstsq`.
+    """
+    n_obs, n_features = X.shape
+    if n_obs >= n_features:
+        Q, R = np.linalg.qr(X)
+        diag = np.abs(np.diag(R))
+        tol = diag.max(initial=0.0) * max(n_obs, n_features) * np.finfo(float).eps
+        if diag.size and diag.min() > tol:
+            return np.linalg.solve(R, Q.T @ Y)
+    coef, *_ = np.linalg.lstsq(X, Y, rcond=None)
+    return coef
+
+
+def batched_lstsq(X: np.ndarray, Y: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Ordinary least squares of every column of ``Y`` on ``X``.
+
+    Missing values (``NaN``) in ``Y`` are handled per column: columns that
+    share the same pattern of available observations are solved together
+    against the corresponding rows of ``X``.  Rows of ``X`` containing
+    missing values are treated as unavailable for every column.
+
+    Parameters
+    ----------
+    X : numpy.ndarray
+        Design matrix of shape ``(T, k)``.
+    Y : numpy.ndarray
+        Targets of shape ``(T, N)``.
+
+    Returns
+    -------
+    coef : numpy.ndarray
+        Coefficients of shape ``(k, N)``.  Columns with fewer than ``k``
+        observations are ``NaN``.
+    residuals : numpy.ndarray
+        Residuals of shape ``(T, N)``; ``NaN`` where ``Y`` was missing.
+    """
+    X = np.asarray(X, dtype=float)
+    Y = np.asarray(Y, dtype=float)
+    if Y.ndim == 1:
+        Y = Y[:, None]
+    n_features = X.shape[1]
+    n_targets = Y.shape[1]
+
+    observed = np.isfinite(Y) & np.isfinite(X).all(axis=1)[:, None]
+    coef = np.full((n_features, n_targets), np.nan)
+
+    complete = observed.all(axis=0)
+    if complete.any():
+        coef[:, complete] = _solve_multi(X, Y[:, complete])
+
+    partial = np.flatnonzero(~complete)
+    if partial.size:
+        patterns, groups = np.unique(
+            observed[:, partial].T, axis=0, return_inverse=True
+        )
+        groups = np.asarray(groups).ravel()
+        for g, rows in enumerate(patterns):
+            if rows.sum() < n_features:
+                continue
+            cols = partial[groups == g]
+            coef[:, cols] = _solve_multi(X[rows], Y[np.ix_(rows, cols)])
+
+    residuals = Y - np.nan_to_num(X) @ np.nan_to_num(coef)
+    residuals[~observed | np.isnan(coef).any(axis=0)] = np.nan
+    return coef, residuals
+
+
+def column_variance(values: np.ndarray, ddof: int = 1) -> np.ndarray:
+    """``NaN``-aware column variance, equivalent to ``DataFrame.var``."""
+    valid = np.isfinite(values)
+    count = valid.sum(axis=0)
+    filled = np.where(valid, values, 0.0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = filled.sum(axis=0) / count
+        centred = np.where(valid, values - mean, 0.0)
+        var = (centred * centred).sum(axis=0) / (count - ddof)
+    var[count <= ddof] = np.nan
+    return var
+
+
+class RollingOLS:
+    """Sufficient statistics for OLS over a sliding set of observations.
+
+    Keeps ``X'X``, ``X'Y`` and the first and second moments of ``Y`` so
+    that observations can be added or removed in ``O(k^2 + kN)`` time and
+    the fit refreshed with a single ``k x k`` solve for all targets.
+    """
+
+    def __init__(self, n_features: int, n_targets: int) -> None:
+        self.xtx = np.zeros((n_features, n_features))
+        self.xty = np.zeros((n_features, n_targets))
+        self.sum_x = np.zeros(n_features)
+        self.sum_y = np.zeros(n_targets)
+        self.sum_yy = np.zeros(n_targets)
+        self.n_obs = 0
+
+    def _update(self, x: np.ndarray, y: np.ndarray, sign: float) -> None:
+        x = np.atleast_2d(np.asarray(x, dtype=float))
+        y = np.atleast_2d(np.asarray(y, dtype=float))
+        self.xtx += sign * (x.T @ x)
+        self.xty += sign * (x.T @ y)
+        self.sum_x += sign * x.sum(axis=0)
+        self.sum_y += sign * y.sum(axis=0)
+        self.sum_yy += sign * (y * y).sum(axis=0)
+        self.n_obs += int(sign) * x.shape[0]
+
+    def add(self, x: np.ndarray, y: np.ndarray) -> None:
+        """Add one observation (or a block of rows) to the statistics."""
+        self._update(x, y, 1.0)
+
+    def remove(self, x: np.ndarray, y: np.ndarray) -> None:
+        """Remove an observation previously passed to :meth:`add`."""
+        self._update(x, y, -1.0)
+
+    def coef(self) -> np.ndarray:
+        """Current coefficients of shape ``(k, N)``."""
+        try:
+            return np.linalg.solve(self.xtx, self.xty)
+        except np.linalg.LinAlgError:
+            coef, *_ = np.linalg.lstsq(self.xtx, self.xty, rcond=None)
+            return coef
+
+    def residual_variance(self, coef: np.ndarray, ddof: int = 1) -> np.ndarray:
+        """Residual variance of every target given ``coef``."""
+        n = self.n_obs
+        if n <= ddof:
+            return np.full(self.sum_y.shape, np.nan)
+        rss = (
+            self.sum_yy
+            - 2.0 * (coef * self.xty).sum(axis=0)
+            + (coef * (self.xtx @ coef)).sum(axis=0)
+        )
+        mean = (self.sum_y - self.sum_x @ coef) / n
+        return np.maximum(rss - n * mean * mean, 0.0) / (n - ddof)
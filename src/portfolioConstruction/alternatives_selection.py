@@ -3,15 +3,25 @@
 This module provides a basic momentum‑based strategy which can be used
 for alternative asset classes such as commodities or currencies.  The
 interface returns a list of assets with the strongest positive momentum.
+
+For backtests, the momentum engine below computes the signal for every
+date at once: rolling cumulative returns for several look-backs from a
+single cumulative sum of log returns, the cross-sectional rank matrix and
+long/short baskets of the top and bottom assets on each date.
 """
 
 from __future__ import annotations
 
-from typing import List
+from typing import Dict, List, Sequence, Tuple
 
+import numpy as np
 import pandas as pd
 
+from .barra_equity_selector import _top_n_indices
+from .instrumentation import instrument
+
 
+@instrument
 def select_alternatives(
     prices: pd.DataFrame, window: int = 60, top_n: int = 5
 ) -> List[str]:
@@ -34,3 +44,123 @@ def select_alternatives(
 
     momentum = prices.pct_change(window).iloc[-1]
     return list(momentum.nlargest(top_n).index)
+
+
+@instrument
+def cumulative_returns(
+    returns: pd.DataFrame, lookbacks: Sequence[int]
+) -> Dict[int, pd.DataFrame]:
+    """Rolling compounded returns for several look-back windows.
+
+    Equivalent to ``returns.rolling(w).apply(lambda x: np.prod(x + 1)) - 1``
+    for each ``w`` in ``lookbacks``, but computed from one cumulative sum
+    of ``log(1 + r)`` so each window is a single subtraction.  Windows
+    containing a missing return are ``NaN``, as with ``rolling``.  Returns
+    of -100% or worse have no logarithm; the few windows containing one
+    are computed as a direct product instead.
+
+    Parameters
+    ----------
+    returns : pandas.DataFrame
+        Periodic returns with assets in columns and time in rows.
+    lookbacks : sequence of int
+        Window lengths in periods, e.g. ``(36, 3)``.
+
+    Returns
+    -------
+    dict
+        Mapping of each look-back to a frame of compounded returns.
+    """
+
+    _check_lookbacks(lookbacks)
+    values = returns.values.astype(float)
+    missing = np.isnan(values)
+    wiped_out = values <= -1.0
+    zeros = np.zeros((1, values.shape[1]))
+    log_growth = np.log1p(np.where(missing | wiped_out, 0.0, values))
+    log_sum = np.vstack([zeros, np.cumsum(log_growth, axis=0)])
+    missing_count = np.vstack([zeros, np.cumsum(missing, axis=0)])
+    wiped_out_count = np.vstack([zeros, np.cumsum(wiped_out, axis=0)])
+
+    result = {}
+    for window in lookbacks:
+        window_log = np.full(values.shape, np.nan)
+        window_log[window - 1 :] = log_sum[window:] - log_sum[:-window]
+        incomplete = np.ones(values.shape, dtype=bool)
+        incomplete[window - 1 :] = (missing_count[window:] - missing_count[:-window]) > 0
+        window_log[incomplete] = np.nan
+        compounded = np.expm1(window_log)
+
+        direct = np.zeros(values.shape, dtype=bool)
+        direct[window - 1 :] = (wiped_out_count[window:] - wiped_out_count[:-window]) > 0
+        for t, j in zip(*np.nonzero(direct & ~incomplete)):
+            compounded[t, j] = np.prod(1.0 + values[t - window + 1 : t + 1, j]) - 1.0
+        result[window] = pd.DataFrame(
+            compounded, index=returns.index, columns=returns.columns
+        )
+    return result
+
+
+def _check_lookbacks(lookbacks: Sequence[int]) -> None:
+    if any(window < 1 for window in lookbacks):
+        raise ValueError("lookback windows must be positive")
+
+
+def price_momentum(
+    prices: pd.DataFrame, lookbacks: Sequence[int]
+) -> Dict[int, pd.DataFrame]:
+    """Momentum ``prices.pct_change(w)`` for several look-backs at once."""
+
+    _check_lookbacks(lookbacks)
+    log_prices = np.log(prices.values.astype(float))
+    result = {}
+    for window in lookbacks:
+        change = np.full(log_prices.shape, np.nan)
+        change[window:] = log_prices[window:] - log_prices[:-window]
+        result[window] = pd.DataFrame(
+            np.expm1(change), index=prices.index, columns=prices.columns
+        )
+    return result
+
+
+def momentum_ranks(signal: pd.DataFrame) -> pd.DataFrame:
+    """Cross-sectional rank of each asset on each date (1 = strongest)."""
+
+    return signal.rank(axis=1, ascending=False, method="first")
+
+
+@instrument
+def long_short_baskets(
+    signal: pd.DataFrame, k: int
+) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """Top-``k`` long and bottom-``k`` short membership for every date.
+
+    Uses a partial partition along the asset axis, so no per-date sorting
+    happens in Python.  Assets tied at the cut-off are taken in column
+    order.  Assets with a missing signal are never selected; when fewer
+    than ``2k`` assets are available on a date the two baskets may
+    overlap.
+
+    Returns
+    -------
+    tuple of pandas.DataFrame
+        Boolean ``(long, short)`` membership frames shaped like ``signal``.
+    """
+
+    values = signal.values.astype(float)
+    valid = ~np.isnan(values)
+    k = min(k, values.shape[1])
+    rows = np.arange(values.shape[0])[:, None]
+
+    def members(scores: np.ndarray) -> np.ndarray:
+        mask = np.zeros(values.shape, dtype=bool)
+        if k > 0:
+            mask[rows, _top_n_indices(scores, k)] = True
+        return mask & valid
+
+    long = members(np.where(valid, values, -np.inf))
+    short = members(np.where(valid, -values, -np.inf))
+    return (
+        pd.DataFrame(long, index=signal.index, columns=signal.columns),
+        pd.DataFrame(short, index=signal.index, columns=signal.columns),
+    )
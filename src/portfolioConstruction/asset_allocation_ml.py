@@ -4,15 +4,28 @@ This script loads historical asset returns and factor features from the
 ``input/`` directory, fits a linear model to predict next period returns
 for each asset, and performs a mean-variance optimisation to allocate
 capital across assets. The optimisation here is the classic closed-form
-solution using the inverse covariance matrix.
+solution using the inverse covariance matrix.  The covariance may also be
+a :class:`~.factor_covariance.FactorCovariance`, in which case the solve
+uses the factor structure instead of a dense inverse.
 """
 from __future__ import annotations
 
 from pathlib import Path
+from typing import Optional
 
 import numpy as np
 import pandas as pd
 
+from ._least_squares import RollingOLS, batched_lstsq
+from .factor_covariance import (
+    CovarianceLike,
+    covariance_matvec,
+    covariance_solve,
+    portfolio_variance,
+)
+from .instrumentation import instrument
+from .memoize import memoize
+
 CAPITAL = 3000  # euros to allocate
 
 
@@ -37,13 +50,15 @@ def load_data(input_dir: Path) -> tuple[pd.DataFrame, pd.DataFrame]:
     return returns, factors
 
 
+@instrument
 def predict_returns(
     returns: pd.DataFrame, factors: pd.DataFrame
 ) -> tuple[pd.Series, np.ndarray]:
     """Predict next-period returns using a linear regression model.
 
     Uses all but the last observation for training and the final row of
-    factor values for prediction.
+    factor values for prediction.  All assets are fitted together with a
+    single factorisation of the shared design matrix.
 
     Returns
     -------
@@ -59,27 +74,362 @@ def predict_returns(
     X_pred = factors.iloc[-1].values
     X = np.column_stack([np.ones(len(X_train)), X_train])
 
-    predicted = {}
-    for asset in returns.columns:
-        y = returns.iloc[:-1][asset].values
-        beta, *_ = np.linalg.lstsq(X, y, rcond=None)
-        predicted[asset] = float(np.dot(np.r_[1, X_pred], beta))
+    beta, _ = batched_lstsq(X, returns.iloc[:-1].values)
+    predicted = pd.Series(np.r_[1, X_pred] @ beta, index=returns.columns)
+
+    cov_matrix = sample_covariance(returns.iloc[:-1])
+    return predicted, cov_matrix
+
+
+@instrument
+@memoize
+def sample_covariance(returns: pd.DataFrame) -> np.ndarray:
+    """Sample covariance of ``returns`` as an array, memoised when the cache is on."""
+    return returns.cov().values
+
+
+@instrument
+def predict_returns_history(
+    returns: pd.DataFrame,
+    factors: pd.DataFrame,
+    window: Optional[int] = None,
+    min_periods: Optional[int] = None,
+) -> pd.DataFrame:
+    """Out-of-sample predicted returns for every date.
+
+    For each date ``t`` the linear model of :func:`predict_returns` is
+    fitted on the observations strictly before ``t`` and evaluated on the
+    factor values at ``t``.  The regression sufficient statistics are
+    updated incrementally, so the whole history costs one ``k x k`` solve
+    per date for all assets together.
+
+    Parameters
+    ----------
+    returns : pandas.DataFrame
+        Asset returns indexed by date.  Missing values are not supported.
+    factors : pandas.DataFrame
+        Factor features sharing the index of ``returns``.
+    window : int | None, optional
+        Length of the rolling training window.  ``None`` uses an expanding
+        window over all prior observations, by default None.
+    min_periods : int | None, optional
+        Minimum number of training observations before predictions are
+        made, by default the number of regressors plus one.
+
+    Returns
+    -------
+    pandas.DataFrame
+        Predicted returns with dates in rows and assets in columns; rows
+        without enough history are ``NaN``.  With an expanding window the
+        last row equals the prediction of :func:`predict_returns`.
+    """
+    if not returns.index.equals(factors.index):
+        raise ValueError("Returns and factors must share the same dates")
+
+    X = np.column_stack([np.ones(len(factors)), factors.values.astype(float)])
+    Y = returns.values.astype(float)
+    if not (np.isfinite(X).all() and np.isfinite(Y).all()):
+        raise ValueError("Rolling predictions require data without missing values")
+    if min_periods is None:
+        min_periods = X.shape[1] + 1
+    if window is not None:
+        min_periods = min(min_periods, window)
 
-    cov_matrix = returns.iloc[:-1].cov().values
-    return pd.Series(predicted), cov_matrix
+    stats = RollingOLS(X.shape[1], Y.shape[1])
+    predicted = np.full(Y.shape, np.nan)
+    for t in range(1, len(X)):
+        stats.add(X[t - 1], Y[t - 1])
+        if window is not None and t > window:
+            stats.remove(X[t - window - 1], Y[t - window - 1])
+        if stats.n_obs >= min_periods:
+            predicted[t] = X[t] @ stats.coef()
+    return pd.DataFrame(predicted, index=returns.index, columns=returns.columns)
 
 
-def mean_variance_weights(mu: pd.Series, cov: np.ndarray) -> pd.Series:
+@instrument
+def mean_variance_weights(mu: pd.Series, cov: CovarianceLike) -> pd.Series:
     """Compute mean-variance optimal weights.
 
     We use the classical solution ``w = Σ⁻¹ μ`` normalised to sum to one.
+    ``Σ⁻¹ μ`` is obtained with a linear solve rather than an explicit
+    inverse; ``cov`` may be dense or a ``FactorCovariance``.
     """
-    inv_cov = np.linalg.inv(cov)
-    raw = inv_cov @ mu.values
+    raw = covariance_solve(cov, mu.values)
     weights = raw / raw.sum()
     return pd.Series(weights, index=mu.index)
 
 
+def _project_budget_box(
+    v: np.ndarray, lower: float, upper: float, shrink: float = 0.0
+) -> np.ndarray:
+    """Project onto ``{sum(w) = 1, lower <= w <= upper}`` after soft-thresholding.
+
+    Returns ``clip(soft(v - t, shrink), lower, upper)`` with the shift
+    ``t`` found by bisection so that the weights sum to one.
+    """
+
+    def weights_at(t: float) -> np.ndarray:
+        shifted = v - t
+        soft = np.sign(shifted) * np.maximum(np.abs(shifted) - shrink, 0.0)
+        return np.clip(soft, lower, upper)
+
+    bound = np.abs(v).max() + shrink + max(abs(lower), abs(upper)) + 1.0
+    lo, hi = -bound, bound
+    for _ in range(100):
+        mid = 0.5 * (lo + hi)
+        total = weights_at(mid).sum()
+        if abs(total - 1.0) < 1e-12:
+            break
+        if total > 1.0:
+            lo = mid
+        else:
+            hi = mid
+    return weights_at(mid)
+
+
+def _project_weights(
+    v: np.ndarray, lower: float, upper: float, leverage_limit: float
+) -> np.ndarray:
+    """Euclidean projection onto the budget, box and leverage constraints."""
+
+    w = _project_budget_box(v, lower, upper)
+    if lower >= 0 or np.abs(w).sum() <= leverage_limit:
+        return w
+    # Tighten the l1 multiplier until gross exposure fits the leverage cap.
+    lo, hi = 0.0, 2.0 * np.abs(v).max() + 1.0
+    while hi - lo > 1e-12:
+        mid = 0.5 * (lo + hi)
+        if np.abs(_project_budget_box(v, lower, upper, shrink=mid)).sum() > leverage_limit:
+            lo = mid
+        else:
+            hi = mid
+    return _project_budget_box(v, lower, upper, shrink=hi)
+
+
+def _largest_eigenvalue(cov: CovarianceLike, n_assets: int, n_iter: int = 50) -> float:
+    """Largest eigenvalue of ``cov`` by power iteration on matrix products."""
+
+    x = np.full(n_assets, 1.0 / np.sqrt(n_assets))
+    value = 0.0
+    for _ in range(n_iter):
+        y = covariance_matvec(cov, x)
+        norm = np.linalg.norm(y)
+        if norm == 0:
+            return 0.0
+        x = y / norm
+        if abs(norm - value) <= 1e-6 * norm:
+            break
+        value = norm
+    return float(norm)
+
+
+def _solve_constrained(
+    mu: np.ndarray,
+    cov: CovarianceLike,
+    risk_aversion: float,
+    lower: float,
+    upper: float,
+    leverage_limit: float,
+    previous: np.ndarray,
+    turnover_penalty: float,
+    start: np.ndarray,
+    tol: float,
+    max_iter: int,
+) -> tuple[np.ndarray, int]:
+    """Accelerated projected gradient with adaptive restart."""
+
+    n_assets = mu.shape[0]
+    lipschitz = risk_aversion * _largest_eigenvalue(cov, n_assets) + turnover_penalty
+    step = 1.0 / max(lipschitz * 1.01, 1e-12)
+
+    def gradient(w: np.ndarray) -> np.ndarray:
+        grad = risk_aversion * covariance_matvec(cov, w) - mu
+        if turnover_penalty:
+            grad += turnover_penalty * (w - previous)
+        return grad
+
+    w = _project_weights(start, lower, upper, leverage_limit)
+    y, momentum = w.copy(), 1.0
+    for iteration in range(1, max_iter + 1):
+        w_next = _project_weights(y - step * gradient(y), lower, upper, leverage_limit)
+        if np.abs(w_next - w).max() < tol:
+            return w_next, iteration
+        momentum_next = 0.5 * (1.0 + np.sqrt(1.0 + 4.0 * momentum * momentum))
+        if (y - w_next) @ (w_next - w) > 0:
+            # Restart when the momentum step points uphill.
+            momentum_next, y = 1.0, w_next.copy()
+        else:
+            y = w_next + ((momentum - 1.0) / momentum_next) * (w_next - w)
+        w, momentum = w_next, momentum_next
+    return w, max_iter
+
+
+@instrument
+def constrained_mean_variance_weights(
+    mu: pd.Series,
+    cov: CovarianceLike,
+    risk_aversion: float = 1.0,
+    weight_limit: float = 0.2,
+    leverage_limit: float = 1.0,
+    long_only: bool = True,
+    previous_weights: Optional[pd.Series] = None,
+    turnover_penalty: float = 0.0,
+    initial_weights: Optional[pd.Series] = None,
+    tol: float = 1e-8,
+    max_iter: int = 1000,
+) -> pd.Series:
+    """Compute constrained mean-variance weights.
+
+    Maximises ``μᵀw - ½ λ wᵀΣw - ½ τ ‖w - w_prev‖²`` subject to the weights
+    summing to one, ``|w_i| <= weight_limit`` (``0 <= w_i`` when
+    ``long_only``) and ``Σ|w_i| <= leverage_limit``, matching the limits
+    of :func:`risk_management.check_limits`.  The problem is solved with
+    an accelerated projected gradient method that only needs products
+    with ``cov``, so a ``FactorCovariance`` works as well as a dense
+    matrix.
+
+    Parameters
+    ----------
+    mu : pandas.Series
+        Expected returns.
+    cov : array-like or FactorCovariance
+        Covariance of returns.
+    risk_aversion : float, optional
+        Risk aversion ``λ``, by default 1.0.
+    weight_limit : float, optional
+        Maximum absolute position size per asset, by default 0.2.
+    leverage_limit : float, optional
+        Maximum total absolute exposure, by default 1.0.
+    long_only : bool, optional
+        Disallow short positions, by default True.
+    previous_weights : pandas.Series | None, optional
+        Weights held before this rebalance, used by the turnover penalty.
+    turnover_penalty : float, optional
+        Quadratic turnover penalty ``τ``, by default 0.0.  Ignored without
+        ``previous_weights``: the first allocation is unpenalised.
+    initial_weights : pandas.Series | None, optional
+        Starting point for the solver, by default ``previous_weights`` or
+        equal weights.
+    tol : float, optional
+        Convergence tolerance on the largest weight change, by default 1e-8.
+    max_iter : int, optional
+        Maximum number of iterations, by default 1000.
+
+    Returns
+    -------
+    pandas.Series
+        Optimal weights indexed like ``mu``.
+    """
+    weights, _ = _constrained_weights(
+        mu,
+        cov,
+        risk_aversion,
+        weight_limit,
+        leverage_limit,
+        long_only,
+        previous_weights,
+        turnover_penalty,
+        initial_weights,
+        tol,
+        max_iter,
+    )
+    return weights
+
+
+def _constrained_weights(
+    mu: pd.Series,
+    cov: CovarianceLike,
+    risk_aversion: float,
+    weight_limit: float,
+    leverage_limit: float,
+    long_only: bool,
+    previous_weights: Optional[pd.Series],
+    turnover_penalty: float,
+    initial_weights: Optional[pd.Series],
+    tol: float,
+    max_iter: int,
+) -> tuple[pd.Series, int]:
+    n_assets = len(mu)
+    lower = 0.0 if long_only else -weight_limit
+    if weight_limit * n_assets < 1.0 or leverage_limit < 1.0:
+        raise ValueError("Constraints leave no fully invested portfolio")
+
+    if previous_weights is None:
+        previous = np.zeros(n_assets)
+        turnover_penalty = 0.0
+    else:
+        previous = previous_weights.reindex(mu.index).fillna(0.0).values
+    if initial_weights is None:
+        initial_weights = previous_weights
+    start = (
+        initial_weights.reindex(mu.index).fillna(0.0).values
+        if initial_weights is not None
+        else np.full(n_assets, 1.0 / n_assets)
+    )
+    weights, n_iter = _solve_constrained(
+        mu.values.astype(float),
+        cov,
+        risk_aversion,
+        lower,
+        weight_limit,
+        leverage_limit,
+        previous,
+        turnover_penalty,
+        start,
+        tol,
+        max_iter,
+    )
+    return pd.Series(weights, index=mu.index), n_iter
+
+
+class MeanVarianceRebalancer:
+    """Sequential constrained mean-variance allocation with warm starts.
+
+    Each call to :meth:`rebalance` starts the solver from the previous
+    solution and penalises turnover against it, so consecutive
+    rebalances in a backtest typically converge in a few iterations.  The
+    first rebalance has nothing to trade away from and is unpenalised.
+    Parameters are those of :func:`constrained_mean_variance_weights`.
+    """
+
+    def __init__(
+        self,
+        risk_aversion: float = 1.0,
+        weight_limit: float = 0.2,
+        leverage_limit: float = 1.0,
+        long_only: bool = True,
+        turnover_penalty: float = 0.0,
+        tol: float = 1e-8,
+        max_iter: int = 1000,
+    ) -> None:
+        self.risk_aversion = risk_aversion
+        self.weight_limit = weight_limit
+        self.leverage_limit = leverage_limit
+        self.long_only = long_only
+        self.turnover_penalty = turnover_penalty
+        self.tol = tol
+        self.max_iter = max_iter
+        self.weights: Optional[pd.Series] = None
+        self.n_iter = 0
+
+    def rebalance(self, mu: pd.Series, cov: CovarianceLike) -> pd.Series:
+        """Solve for new weights given updated ``mu`` and ``cov``."""
+        self.weights, self.n_iter = _constrained_weights(
+            mu,
+            cov,
+            self.risk_aversion,
+            self.weight_limit,
+            self.leverage_limit,
+            self.long_only,
+            self.weights,
+            self.turnover_penalty,
+            self.weights,
+            self.tol,
+            self.max_iter,
+        )
+        return self.weights
+
+
 def main() -> None:
     input_dir = Path(__file__).resolve().parents[2] / "input"
     returns, factors = load_data(input_dir)
@@ -88,7 +438,7 @@ def main() -> None:
 
     allocation = weights * CAPITAL
     expected_return = float(weights @ mu)
-    expected_risk = float(np.sqrt(weights.values @ cov @ weights.values))
+    expected_risk = float(np.sqrt(portfolio_variance(weights.values, cov)))
 
     print("Predicted returns:")
     print(mu)
@@ -9,12 +9,80 @@ and factor data.
 
 from __future__ import annotations
 
-from typing import List
+from typing import Dict, Iterator, List, NamedTuple, Optional, Sequence, Tuple, Union
 
 import numpy as np
 import pandas as pd
 
+from ._least_squares import RollingOLS, batched_lstsq, column_variance
+from .instrumentation import instrument
+from .memoize import memoize
 
+
+class FactorModelFit(NamedTuple):
+    """Result of a single-pass factor model estimation."""
+
+    exposures: pd.DataFrame
+    residuals: pd.DataFrame
+    idiosyncratic_risk: pd.Series
+
+
+class RollingFactorExposures(NamedTuple):
+    """Time series of factor exposures and residual variances."""
+
+    exposures: pd.DataFrame
+    idiosyncratic_risk: pd.DataFrame
+
+
+@instrument
+def fit_factor_model(
+    returns: pd.DataFrame, factor_returns: pd.DataFrame
+) -> FactorModelFit:
+    """Estimate exposures, residuals and idiosyncratic risk in one pass.
+
+    The factor matrix is factorised once and all assets are solved
+    together.  Assets with missing returns are grouped by their pattern of
+    available observations and each group is solved against the matching
+    rows of ``factor_returns``.
+
+    Parameters
+    ----------
+    returns : pandas.DataFrame
+        Asset returns with assets in columns and time in rows.
+    factor_returns : pandas.DataFrame
+        Factor returns aligned on the same index as ``returns``.
+
+    Returns
+    -------
+    FactorModelFit
+        Exposures (assets x factors), residuals (time x assets) and the
+        residual variance of each asset.
+    """
+
+    coef, residuals = batched_lstsq(factor_returns.values, returns.values)
+    exposures = pd.DataFrame(
+        coef.T, index=returns.columns, columns=factor_returns.columns
+    )
+    residuals = pd.DataFrame(residuals, index=returns.index, columns=returns.columns)
+    idio = pd.Series(column_variance(residuals.values), index=returns.columns)
+    return FactorModelFit(exposures, residuals, idio)
+
+
+@memoize
+def _factor_model_estimates(
+    returns: pd.DataFrame, factor_returns: pd.DataFrame
+) -> Tuple[pd.DataFrame, pd.Series]:
+    """Exposures and idiosyncratic risk from :func:`fit_factor_model`.
+
+    Memoised when the estimator cache is enabled (see :mod:`.memoize`),
+    so parameter sweeps over :func:`select_equities` fit the same data
+    once.  Only these per-asset results are cached, not the residuals.
+    """
+    fit = fit_factor_model(returns, factor_returns)
+    return fit.exposures, fit.idiosyncratic_risk
+
+
+@instrument
 def compute_factor_exposures(
     returns: pd.DataFrame, factor_returns: pd.DataFrame
 ) -> pd.DataFrame:
@@ -33,15 +101,11 @@ def compute_factor_exposures(
         Estimated factor exposures (betas) for each asset.
     """
 
-    exposures = {}
-    X = factor_returns.values
-    for asset in returns:
-        y = returns[asset].values
-        beta, *_ = np.linalg.lstsq(X, y, rcond=None)
-        exposures[asset] = beta
-    return pd.DataFrame(exposures, index=factor_returns.columns).T
+    return _factor_model_estimates(returns, factor_returns)[0]
 
 
+@instrument
+@memoize
 def compute_idiosyncratic_risk(
     returns: pd.DataFrame, factor_returns: pd.DataFrame, exposures: pd.DataFrame
 ) -> pd.Series:
@@ -52,6 +116,51 @@ def compute_idiosyncratic_risk(
     return residuals.var()
 
 
+def total_variance(
+    exposures: pd.DataFrame, factor_cov: pd.DataFrame, idiosyncratic_risk: pd.Series
+) -> pd.Series:
+    """Total variance ``diag(B F B') + D`` without forming the N x N matrix."""
+
+    B = exposures.values
+    systematic = np.einsum("ik,kl,il->i", B, factor_cov.values, B, optimize=True)
+    return pd.Series(
+        systematic + idiosyncratic_risk.reindex(exposures.index).values,
+        index=exposures.index,
+    )
+
+
+def _top_n_indices(scores: np.ndarray, top_n: int) -> np.ndarray:
+    """Indices of the ``top_n`` largest scores in each row, best first.
+
+    Uses a partial partition so only the selected block is sorted.  Ties
+    keep the original asset order and ``NaN`` scores rank last, as with
+    ``np.argsort(-scores, kind="stable")[:, :top_n]``.
+    """
+
+    scores = np.where(np.isnan(scores), -np.inf, scores)
+    n_rows, n_assets = scores.shape
+    top_n = min(max(top_n, 0), n_assets)
+    if 0 < top_n < n_assets:
+        # Keep every asset tied with the cut-off score, in asset order, so
+        # the stable sort below decides which of them make the cut.
+        cutoff = -np.partition(-scores, top_n - 1, axis=1)[:, top_n - 1]
+        keep = scores >= cutoff[:, None]
+        rows, cols = np.nonzero(keep)
+        slot = np.cumsum(keep, axis=1)[rows, cols] - 1
+        idx = np.zeros((n_rows, keep.sum(axis=1).max()), dtype=np.intp)
+        filled = np.zeros(idx.shape, dtype=bool)
+        idx[rows, slot] = cols
+        filled[rows, slot] = True
+        # Padding sorts after every real candidate.
+        key = np.where(filled, -np.take_along_axis(scores, idx, axis=1), np.inf)
+        order = np.argsort(key, axis=1, kind="stable")
+        return np.take_along_axis(idx, order, axis=1)[:, :top_n]
+    idx = np.broadcast_to(np.arange(n_assets), scores.shape)
+    order = np.argsort(-scores, axis=1, kind="stable")
+    return np.take_along_axis(idx, order, axis=1)[:, :top_n]
+
+
+@instrument
 def optimize_selection(
     expected_returns: pd.Series,
     exposures: pd.DataFrame,
@@ -66,15 +175,48 @@ def optimize_selection(
     where variance combines both factor and idiosyncratic components.
     """
 
-    scores = {}
-    for asset in expected_returns.index:
-        beta = exposures.loc[asset].values
-        systematic = beta @ factor_cov.values @ beta
-        total_var = systematic + idiosyncratic_risk[asset]
-        scores[asset] = expected_returns[asset] - risk_aversion * total_var
-    return [a for a, _ in sorted(scores.items(), key=lambda x: x[1], reverse=True)[:top_n]]
+    return sweep_risk_aversion(
+        expected_returns,
+        exposures,
+        factor_cov,
+        idiosyncratic_risk,
+        risk_aversions=[risk_aversion],
+        top_n=top_n,
+    )[risk_aversion]
+
+
+@instrument
+def sweep_risk_aversion(
+    expected_returns: pd.Series,
+    exposures: pd.DataFrame,
+    factor_cov: pd.DataFrame,
+    idiosyncratic_risk: pd.Series,
+    risk_aversions: Sequence[float],
+    top_n: int = 10,
+) -> Dict[float, List[str]]:
+    """Run :func:`optimize_selection` for several risk aversions at once.
+
+    The asset variances are computed once and every ``risk_aversion`` is
+    scored in a single array operation.
+
+    Returns
+    -------
+    dict
+        Mapping of each risk aversion to its list of selected assets.
+    """
+
+    assets = expected_returns.index
+    # ``.loc`` raises KeyError for assets without exposures or residual risk.
+    variance = total_variance(
+        exposures.loc[assets], factor_cov, idiosyncratic_risk.loc[assets]
+    ).values
+    lambdas = np.asarray(risk_aversions, dtype=float).reshape(-1, 1)
+    scores = expected_returns.values[None, :] - lambdas * variance[None, :]
+    picks = _top_n_indices(scores, top_n)
+    return {lam: list(assets[row]) for lam, row in zip(risk_aversions, picks)}
 
 
+@instrument
 def select_equities(
     returns: pd.DataFrame,
     factor_returns: pd.DataFrame,
@@ -89,13 +231,169 @@ def select_equities(
     calculation and the simple optimization routine.
     """
 
-    exposures = compute_factor_exposures(returns, factor_returns)
-    idio = compute_idiosyncratic_risk(returns, factor_returns, exposures)
+    exposures, idiosyncratic_risk = _factor_model_estimates(returns, factor_returns)
     return optimize_selection(
         expected_returns=expected_returns,
         exposures=exposures,
         factor_cov=factor_cov,
-        idiosyncratic_risk=idio,
+        idiosyncratic_risk=idiosyncratic_risk,
         risk_aversion=risk_aversion,
         top_n=top_n,
     )
+
+
+def iter_rolling_factor_exposures(
+    returns: pd.DataFrame,
+    factor_returns: pd.DataFrame,
+    window: int,
+    refit_every: Optional[int] = None,
+) -> Iterator[Tuple[object, np.ndarray, np.ndarray, np.ndarray]]:
+    """Yield exposures over a trailing window, updated incrementally.
+
+    The sufficient statistics ``X'X`` and ``X'Y`` are updated as each
+    observation enters and leaves the window, so each step costs
+    ``O(k^2 N)`` regardless of the window length.
+
+    Parameters
+    ----------
+    returns : pandas.DataFrame
+        Asset returns with assets in columns and time in rows.  Missing
+        values are not supported in rolling mode.
+    factor_returns : pandas.DataFrame
+        Factor returns aligned on the same index as ``returns``.
+    window : int
+        Number of observations in each estimation window.
+    refit_every : int | None, optional
+        Rebuild the statistics from the raw window every ``refit_every``
+        steps to bound floating point drift, by default never.
+
+    Yields
+    ------
+    tuple
+        ``(date, exposures, idiosyncratic_risk, factor_cov)`` where
+        ``exposures`` has shape ``(N, k)``, ``idiosyncratic_risk`` shape
+        ``(N,)`` and ``factor_cov`` is the ``(k, k)`` sample covariance of
+        the factors over the same window.
+    """
+
+    X = factor_returns.values.astype(float)
+    Y = returns.values.astype(float)
+    if not (np.isfinite(X).all() and np.isfinite(Y).all()):
+        raise ValueError("Rolling exposures require returns without missing values")
+    if window <= X.shape[1]:
+        raise ValueError("window must exceed the number of factors")
+
+    stats = RollingOLS(X.shape[1], Y.shape[1])
+    for t in range(X.shape[0]):
+        start = t - window + 1
+        if refit_every and start > 0 and start % refit_every == 0:
+            stats = RollingOLS(X.shape[1], Y.shape[1])
+            stats.add(X[start : t + 1], Y[start : t + 1])
+        else:
+            stats.add(X[t], Y[t])
+            if start > 0:
+                stats.remove(X[start - 1], Y[start - 1])
+        if start < 0:
+            continue
+        coef = stats.coef()
+        mean_x = stats.sum_x / window
+        factor_cov = (stats.xtx - window * np.outer(mean_x, mean_x)) / (window - 1)
+        yield returns.index[t], coef.T, stats.residual_variance(coef), factor_cov
+
+
+@instrument
+def rolling_factor_exposures(
+    returns: pd.DataFrame,
+    factor_returns: pd.DataFrame,
+    window: int,
+    refit_every: Optional[int] = None,
+) -> RollingFactorExposures:
+    """Rolling-window factor exposures and idiosyncratic risk for all assets.
+
+    See :func:`iter_rolling_factor_exposures` for the update scheme.
+
+    Returns
+    -------
+    RollingFactorExposures
+        ``exposures`` indexed by ``(date, asset)`` with factors in columns
+        and ``idiosyncratic_risk`` with dates in rows and assets in columns.
+    """
+
+    dates, betas, idio = [], [], []
+    for date, beta, var, _ in iter_rolling_factor_exposures(
+        returns, factor_returns, window, refit_every
+    ):
+        dates.append(date)
+        betas.append(beta)
+        idio.append(var)
+
+    n_assets, n_factors = returns.shape[1], factor_returns.shape[1]
+    date_index = pd.Index(dates, name=returns.index.name)
+    exposures = pd.DataFrame(
+        np.reshape(betas, (len(dates) * n_assets, n_factors)),
+        index=pd.MultiIndex.from_product([date_index, returns.columns]),
+        columns=factor_returns.columns,
+    )
+    idiosyncratic_risk = pd.DataFrame(
+        np.reshape(idio, (len(dates), n_assets)),
+        index=date_index,
+        columns=returns.columns,
+    )
+    return RollingFactorExposures(exposures, idiosyncratic_risk)
+
+
+@instrument
+def rolling_select_equities(
+    returns: pd.DataFrame,
+    factor_returns: pd.DataFrame,
+    expected_returns: Union[pd.Series, pd.DataFrame],
+    window: int,
+    factor_cov: Optional[pd.DataFrame] = None,
+    risk_aversion: float = 1.0,
+    top_n: int = 10,
+    refit_every: Optional[int] = None,
+) -> Dict[object, List[str]]:
+    """Walk-forward equity selection on a trailing estimation window.
+
+    Equivalent to calling :func:`select_equities` on every trailing window
+    of ``returns``, but the exposures are updated incrementally.
+
+    Parameters
+    ----------
+    expected_returns : pandas.Series or pandas.DataFrame
+        Either a fixed vector of expected returns or a frame indexed by
+        date with one row per rebalance date.
+    factor_cov : pandas.DataFrame | None, optional
+        Factor covariance to use for every date.  If omitted, the sample
+        covariance of the factors over each window is used.
+
+    Returns
+    -------
+    dict
+        Mapping of date to the list of selected equities.
+    """
+
+    assets, factors = returns.columns, factor_returns.columns
+    selections = {}
+    for date, beta, var, window_cov in iter_rolling_factor_exposures(
+        returns, factor_returns, window, refit_every
+    ):
+        if isinstance(expected_returns, pd.DataFrame):
+            if date not in expected_returns.index:
+                continue
+            mu = expected_returns.loc[date]
+        else:
+            mu = expected_returns
+        selections[date] = optimize_selection(
+            expected_returns=mu,
+            exposures=pd.DataFrame(beta, index=assets, columns=factors),
+            factor_cov=(
+                factor_cov
+                if factor_cov is not None
+                else pd.DataFrame(window_cov, index=factors, columns=factors)
+            ),
+            idiosyncratic_risk=pd.Series(var, index=assets),
+            risk_aversion=risk_aversion,
+            top_n=top_n,
+        )
+    return selections
@@ -0,0 +1,165 @@
+"""Structured covariance built from a factor risk model.
+
+The BARRA workflow in :mod:`barra_equity_selector` estimates factor
+exposures ``B`` (N x k), a factor covariance ``F`` (k x k) and an
+idiosyncratic variance ``D`` per asset.  Together they define the asset
+covariance ``Σ = B F Bᵀ + diag(D)``.  :class:`FactorCovariance` keeps the
+three pieces and implements products, portfolio variance and linear
+solves directly on them, so memory stays ``O(N·k)`` and the N x N matrix
+is never formed.
+
+The helper functions at the bottom accept either a dense covariance
+(``numpy.ndarray`` or ``pandas.DataFrame``) or a :class:`FactorCovariance`
+so that allocation and risk code can work with both.
+"""
+
+from __future__ import annotations
+
+from typing import Optional, Union
+
+import numpy as np
+import pandas as pd
+
+
+class FactorCovariance:
+    """Covariance matrix ``B F Bᵀ + diag(D)`` held in factored form.
+
+    Parameters
+    ----------
+    exposures : array-like
+        Factor exposures of shape ``(N, k)``.
+    factor_cov : array-like
+        Factor covariance of shape ``(k, k)``.
+    idiosyncratic_risk : array-like
+        Idiosyncratic variances of shape ``(N,)``.
+    index : pandas.Index | None, optional
+        Asset labels, by default the index of ``exposures`` if it has one.
+    """
+
+    # Make ``ndarray @ FactorCovariance`` defer to ``__rmatmul__``.
+    __array_ufunc__ = None
+
+    def __init__(
+        self,
+        exposures,
+        factor_cov,
+        idiosyncratic_risk,
+        index: Optional[pd.Index] = None,
+    ) -> None:
+        if index is None and isinstance(exposures, pd.DataFrame):
+            index = exposures.index
+        self.B = np.asarray(exposures, dtype=float)
+        self.F = np.asarray(factor_cov, dtype=float)
+        self.D = np.asarray(idiosyncratic_risk, dtype=float)
+        n_assets, n_factors = self.B.shape
+        if self.F.shape != (n_factors, n_factors):
+            raise ValueError("factor_cov must be k x k for k factors in exposures")
+        if self.D.shape != (n_assets,):
+            raise ValueError("idiosyncratic_risk must have one entry per asset")
+        self.index = index
+        self._capacitance = None
+
+    @classmethod
+    def from_barra(
+        cls,
+        exposures: pd.DataFrame,
+        factor_cov: pd.DataFrame,
+        idiosyncratic_risk: pd.Series,
+    ) -> "FactorCovariance":
+        """Build from labelled BARRA estimates, aligning assets and factors."""
+        factor_cov = factor_cov.loc[exposures.columns, exposures.columns]
+        idio = idiosyncratic_risk.reindex(exposures.index)
+        return cls(exposures.values, factor_cov.values, idio.values, exposures.index)
+
+    @property
+    def shape(self) -> tuple:
+        n = self.B.shape[0]
+        return (n, n)
+
+    @property
+    def nbytes(self) -> int:
+        return self.B.nbytes + self.F.nbytes + self.D.nbytes
+
+    def diag(self) -> np.ndarray:
+        """Asset variances ``diag(Σ)``."""
+        return np.einsum("ik,kl,il->i", self.B, self.F, self.B) + self.D
+
+    def matvec(self, x) -> np.ndarray:
+        """Product ``Σ x`` for a vector ``(N,)`` or a block ``(N, m)``."""
+        x = np.asarray(x, dtype=float)
+        D = self.D if x.ndim == 1 else self.D[:, None]
+        return self.B @ (self.F @ (self.B.T @ x)) + D * x
+
+    def __matmul__(self, x) -> np.ndarray:
+        return self.matvec(x)
+
+    def __rmatmul__(self, x) -> np.ndarray:
+        # Σ is symmetric, so xᵀ Σ = (Σ x)ᵀ.
+        return self.matvec(np.asarray(x, dtype=float).T).T
+
+    def portfolio_variance(self, weights) -> Union[float, np.ndarray]:
+        """``wᵀ Σ w`` for one portfolio ``(N,)`` or many ``(m, N)``."""
+        w = np.asarray(weights, dtype=float)
+        factor_exposure = w @ self.B
+        systematic = np.einsum(
+            "...k,kl,...l->...", factor_exposure, self.F, factor_exposure
+        )
+        variance = systematic + (w * w) @ self.D
+        return float(variance) if w.ndim == 1 else variance
+
+    def solve(self, rhs) -> np.ndarray:
+        """Solve ``Σ x = rhs`` using the Woodbury identity.
+
+        ``Σ⁻¹ = D⁻¹ - D⁻¹ B (I + F Bᵀ D⁻¹ B)⁻¹ F Bᵀ D⁻¹`` only needs a
+        ``k x k`` factorisation, which is cached after the first call.
+        """
+        if np.any(self.D <= 0):
+            raise np.linalg.LinAlgError("Idiosyncratic variances must be positive")
+        rhs = np.asarray(rhs, dtype=float)
+        d_inv = 1.0 / self.D
+        if self._capacitance is None:
+            k = self.F.shape[0]
+            self._capacitance = np.eye(k) + self.F @ (self.B.T * d_inv) @ self.B
+        if rhs.ndim > 1:
+            d_inv = d_inv[:, None]
+        y = d_inv * rhs
+        u = np.linalg.solve(self._capacitance, self.F @ (self.B.T @ y))
+        return y - d_inv * (self.B @ u)
+
+    def to_dense(self) -> np.ndarray:
+        """Materialise the full N x N matrix (for small universes and checks)."""
+        return self.B @ self.F @ self.B.T + np.diag(self.D)
+
+
+CovarianceLike = Union[np.ndarray, pd.DataFrame, FactorCovariance]
+
+
+def covariance_solve(cov: CovarianceLike, rhs) -> np.ndarray:
+    """Solve ``cov x = rhs`` for a dense or factor-model covariance."""
+    if isinstance(cov, FactorCovariance):
+        return cov.solve(rhs)
+    return np.linalg.solve(np.asarray(cov, dtype=float), np.asarray(rhs, dtype=float))
+
+
+def covariance_matvec(cov: CovarianceLike, x) -> np.ndarray:
+    """Product ``cov x`` for a dense or factor-model covariance."""
+    if isinstance(cov, FactorCovariance):
+        return cov.matvec(x)
+    return np.asarray(cov, dtype=float) @ np.asarray(x, dtype=float)
+
+
+def portfolio_variance(weights, cov: CovarianceLike) -> Union[float, np.ndarray]:
+    """Portfolio variance ``wᵀ cov w`` for one or many weight vectors."""
+    if isinstance(cov, FactorCovariance):
+        return cov.portfolio_variance(weights)
+    w = np.asarray(weights, dtype=float)
+    variance = np.einsum("...i,ij,...j->...", w, np.asarray(cov, dtype=float), w)
+    return float(variance) if w.ndim == 1 else variance
+
+
+__all__ = [
+    "FactorCovariance",
+    "covariance_solve",
+    "covariance_matvec",
+    "portfolio_variance",
+]
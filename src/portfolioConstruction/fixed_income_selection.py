@@ -4,15 +4,26 @@ This module implements a minimal example of a fixed income selection
 model using yield‑curve changes and credit spread information.  The
 interface returns a list of selected bonds based on a simple scoring
 metric that combines carry and spread momentum.
+
+For backtests, :func:`fixed_income_scores` computes the signals for every
+date at once: carry, spread momentum over several horizons and roll-down
+along a curve built from tenor buckets.  It returns the date x bond score
+matrix and the top bonds on each date, and can walk large universes in
+column chunks so memory is bounded by the chunk size.
 """
 
 from __future__ import annotations
 
-from typing import List
+from typing import Dict, List, NamedTuple, Optional, Sequence, Union
 
+import numpy as np
 import pandas as pd
 
+from .barra_equity_selector import _top_n_indices
+from .instrumentation import instrument
+
 
+@instrument
 def select_fixed_income(
     yields: pd.DataFrame,
     credit_spreads: pd.DataFrame,
@@ -41,3 +52,238 @@ def select_fixed_income(
     spread_mom = -credit_spreads.diff().iloc[-1]
     score = carry + spread_mom
     return list(score.nlargest(top_n).index)
+
+
+DEFAULT_TENOR_BUCKETS = (0.0, 1.0, 2.0, 3.0, 5.0, 7.0, 10.0, 20.0, 30.0, np.inf)
+DEFAULT_SIGNAL_WEIGHTS = {"carry": 1.0, "spread_momentum": 1.0, "roll_down": 1.0}
+
+
+class FixedIncomeScores(NamedTuple):
+    """Output of :func:`fixed_income_scores`."""
+
+    scores: Optional[pd.DataFrame]
+    selected: pd.DataFrame
+
+
+def _tenor_block(
+    tenors: Union[pd.Series, pd.DataFrame], columns: pd.Index, index: pd.Index
+) -> np.ndarray:
+    """Tenors of ``columns`` as a dates x bonds array."""
+    if isinstance(tenors, pd.DataFrame):
+        return tenors.reindex(index=index, columns=columns).values.astype(float)
+    values = tenors.reindex(columns).values.astype(float)
+    return np.broadcast_to(values, (len(index), len(columns)))
+
+
+def _curve_slopes(
+    yields: pd.DataFrame,
+    tenors: Union[pd.Series, pd.DataFrame],
+    edges: np.ndarray,
+    chunk_size: int,
+) -> np.ndarray:
+    """Curve slope (yield per year of tenor) of each tenor bucket per date.
+
+    The curve point of a bucket is the average yield and average tenor of
+    the bonds in it.  A bucket's slope is taken towards the next shorter
+    non-empty neighbour, or the next longer one for the shortest bucket.
+    """
+    n_dates, n_bonds = yields.shape
+    n_buckets = len(edges) - 1
+    yield_sum = np.zeros((n_dates, n_buckets))
+    tenor_sum = np.zeros((n_dates, n_buckets))
+    count = np.zeros((n_dates, n_buckets))
+    rows = np.arange(n_dates)[:, None] * n_buckets
+    for start in range(0, n_bonds, chunk_size):
+        block = yields.iloc[:, start : start + chunk_size]
+        y = block.values.astype(float)
+        tenor = _tenor_block(tenors, block.columns, yields.index)
+        bucket = np.searchsorted(edges, tenor, side="right") - 1
+        valid = np.isfinite(y) & np.isfinite(tenor) & (bucket >= 0) & (bucket < n_buckets)
+        flat = (rows + bucket)[valid]
+        size = n_dates * n_buckets
+        yield_sum += np.bincount(flat, y[valid], minlength=size).reshape(n_dates, n_buckets)
+        tenor_sum += np.bincount(flat, tenor[valid], minlength=size).reshape(n_dates, n_buckets)
+        count += np.bincount(flat, minlength=size).reshape(n_dates, n_buckets)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        level = yield_sum / count
+        point = tenor_sum / count
+    # Carry the last non-empty bucket forward so each bucket finds its
+    # nearest shorter neighbour.
+    filled = np.where(count > 0, np.arange(n_buckets), -1)
+    previous = np.maximum.accumulate(filled, axis=1)
+    previous = np.concatenate([np.full((n_dates, 1), -1), previous[:, :-1]], axis=1)
+    has_previous = previous >= 0
+    prev_idx = np.where(has_previous, previous, 0)
+    prev_level = np.take_along_axis(level, prev_idx, axis=1)
+    prev_point = np.take_along_axis(point, prev_idx, axis=1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        slope = np.where(
+            has_previous, (level - prev_level) / (point - prev_point), np.nan
+        )
+    # Shortest occupied bucket: use the slope of the next occupied one.
+    backward = np.where(np.isfinite(slope), np.arange(n_buckets), n_buckets)
+    following = np.minimum.accumulate(backward[:, ::-1], axis=1)[:, ::-1]
+    has_following = following < n_buckets
+    next_slope = np.take_along_axis(slope, np.where(has_following, following, 0), axis=1)
+    slope = np.where(np.isfinite(slope), slope, np.where(has_following, next_slope, 0.0))
+    return np.nan_to_num(slope, nan=0.0, posinf=0.0, neginf=0.0)
+
+
+def _merge_top(
+    best_scores: np.ndarray,
+    best_idx: np.ndarray,
+    scores: np.ndarray,
+    offset: int,
+    top_n: int,
+):
+    """Merge a chunk's scores into the running top ``top_n`` of each row.
+
+    The running top is kept in bond order, so the candidates are in bond
+    order too and ties at the cut-off go to the earlier bond.
+    """
+    n_dates, width = scores.shape
+    chunk_idx = np.broadcast_to(np.arange(offset, offset + width), scores.shape)
+    cand_scores = np.concatenate([best_scores, scores], axis=1)
+    cand_idx = np.concatenate([best_idx, chunk_idx], axis=1)
+    if cand_scores.shape[1] > top_n:
+        keep = np.sort(_top_n_indices(cand_scores, top_n), axis=1)
+        cand_scores = np.take_along_axis(cand_scores, keep, axis=1)
+        cand_idx = np.take_along_axis(cand_idx, keep, axis=1)
+    return cand_scores, cand_idx
+
+
+@instrument
+def fixed_income_scores(
+    yields: pd.DataFrame,
+    credit_spreads: pd.DataFrame,
+    top_n: int = 10,
+    momentum_horizons: Sequence[int] = (1,),
+    tenors: Optional[Union[pd.Series, pd.DataFrame]] = None,
+    tenor_buckets: Sequence[float] = DEFAULT_TENOR_BUCKETS,
+    roll_horizon: float = 1.0,
+    signal_weights: Optional[Dict[str, float]] = None,
+    chunk_size: Optional[int] = None,
+    keep_scores: bool = True,
+) -> FixedIncomeScores:
+    """Score every bond on every date and select the top ``top_n`` per date.
+
+    The score is a weighted sum of
+
+    * carry: the current yield;
+    * spread momentum: the tightening ``-(s_t - s_{t-h})`` of the credit
+      spread, averaged over ``momentum_horizons``;
+    * roll-down: ``tenor * slope * roll_horizon``, the price return from
+      rolling ``roll_horizon`` years down the curve, with the tenor as a
+      duration proxy.  The curve is the average yield per tenor bucket on
+      each date, and ``slope`` that of the bond's bucket.  Only used when
+      ``tenors`` is given.
+
+    With the defaults and no tenors the last row of scores is the score
+    used by :func:`select_fixed_income`.
+
+    Parameters
+    ----------
+    yields : pandas.DataFrame
+        Bond yields with bonds in columns and dates in rows.
+    credit_spreads : pandas.DataFrame
+        Credit spreads aligned with ``yields``.
+    top_n : int, optional
+        Number of bonds selected per date, by default 10.
+    momentum_horizons : sequence of int, optional
+        Spread momentum horizons in periods, by default ``(1,)``.
+    tenors : pandas.Series | pandas.DataFrame | None, optional
+        Years to maturity per bond, or per date and bond, by default None.
+    tenor_buckets : sequence of float, optional
+        Bucket edges in years, by default
+        :data:`DEFAULT_TENOR_BUCKETS`.
+    roll_horizon : float, optional
+        Roll-down horizon in years, by default 1.0.
+    signal_weights : dict | None, optional
+        Weights of ``carry``, ``spread_momentum`` and ``roll_down``, by
+        default 1 each.
+    chunk_size : int | None, optional
+        Number of bonds processed at a time, by default all at once.
+    keep_scores : bool, optional
+        Return the full score matrix; set to False for very large
+        universes where only the selection is needed, by default True.
+
+    Returns
+    -------
+    FixedIncomeScores
+        ``scores`` (dates x bonds, or None) and ``selected``: the
+        ``top_n`` bonds per date, best first, missing where fewer bonds
+        have a score.
+    """
+    if not yields.index.equals(credit_spreads.index):
+        raise ValueError("Yields and credit spreads must share the same dates")
+    spreads = credit_spreads.reindex(columns=yields.columns)
+    weights = {**DEFAULT_SIGNAL_WEIGHTS, **(signal_weights or {})}
+    horizons = list(momentum_horizons)
+    if any(h < 1 for h in horizons):
+        raise ValueError("momentum_horizons must be positive integers")
+    n_dates, n_bonds = yields.shape
+    chunk_size = chunk_size or max(n_bonds, 1)
+    top_n = min(max(top_n, 0), n_bonds)
+
+    slopes = None
+    if tenors is not None and weights["roll_down"]:
+        edges = np.asarray(tenor_buckets, dtype=float)
+        slopes = _curve_slopes(yields, tenors, edges, chunk_size)
+
+    scores = np.empty((n_dates, n_bonds)) if keep_scores else None
+    best_scores = np.empty((n_dates, 0))
+    best_idx = np.empty((n_dates, 0), dtype=np.intp)
+    for start in range(0, n_bonds, chunk_size):
+        stop = min(start + chunk_size, n_bonds)
+        y = yields.iloc[:, start:stop].values.astype(float)
+        s = spreads.iloc[:, start:stop].values.astype(float)
+
+        score = weights["carry"] * y
+        if weights["spread_momentum"] and horizons:
+            momentum = np.zeros_like(s)
+            for h in horizons:
+                change = np.full_like(s, np.nan)
+                change[h:] = s[h:] - s[:-h]
+                momentum -= change
+            score = score + weights["spread_momentum"] * momentum / len(horizons)
+        if slopes is not None:
+            tenor = _tenor_block(tenors, yields.columns[start:stop], yields.index)
+            bucket = np.searchsorted(edges, tenor, side="right") - 1
+            inside = np.isfinite(tenor) & (bucket >= 0) & (bucket < len(edges) - 1)
+            slope = np.take_along_axis(slopes, np.where(inside, bucket, 0), axis=1)
+            roll_down = np.where(inside, tenor * slope * roll_horizon, 0.0)
+            score = score + weights["roll_down"] * roll_down
+
+        if keep_scores:
+            scores[:, start:stop] = score
+        if top_n:
+            best_scores, best_idx = _merge_top(
+                best_scores,
+                best_idx,
+                np.where(np.isnan(score), -np.inf, score),
+                start,
+                top_n,
+            )
+
+    # Best first; the running top is in bond order, so ties keep it.
+    order = np.argsort(-best_scores, axis=1, kind="stable")
+    best_idx = np.take_along_axis(best_idx, order, axis=1)
+    best_scores = np.take_along_axis(best_scores, order, axis=1)
+    labels = np.asarray(yields.columns, dtype=object)[best_idx]
+    labels[~np.isfinite(best_scores)] = None
+    selected = pd.DataFrame(labels, index=yields.index, columns=range(1, top_n + 1))
+
+    if keep_scores:
+        scores = pd.DataFrame(scores, index=yields.index, columns=yields.columns)
+    return FixedIncomeScores(scores, selected)
+
+
+def selection_membership(selected: pd.DataFrame, bonds: pd.Index) -> pd.DataFrame:
+    """Boolean dates x bonds matrix marking the bonds in ``selected``."""
+    positions = bonds.get_indexer(selected.values.ravel())
+    rows = np.repeat(np.arange(len(selected)), selected.shape[1])
+    valid = positions >= 0
+    member = np.zeros((len(selected), len(bonds)), dtype=bool)
+    member[rows[valid], positions[valid]] = True
+    return pd.DataFrame(member, index=selected.index, columns=bonds)
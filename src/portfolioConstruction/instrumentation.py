@@ -0,0 +1,292 @@
+"""Timing and memory instrumentation for the pipeline stages.
+
+Public functions of the package (and ``helper.load_data``) are wrapped
+with :func:`instrument`.  Instrumentation is off by default, in which
+case the wrapper only checks a flag before calling through.  Inside a
+:func:`profile` block every instrumented call records its wall time,
+call count, the shapes of its array and frame arguments and, with
+``trace_memory=True``, its peak allocation as seen by :mod:`tracemalloc`.
+
+Calls are aggregated both per stage and per call path (e.g.
+``select_equities;fit_factor_model``), so the result can be written as
+JSON (:meth:`Profile.to_json`) or as collapsed stacks
+(:meth:`Profile.to_collapsed`) for flame-graph tools, and two runs can be
+compared with :func:`diff_profiles`::
+
+    with profile(trace_memory=True) as prof:
+        run_nightly()
+    prof.to_json("profile.json")
+    prof.to_collapsed("profile.folded")
+"""
+
+from __future__ import annotations
+
+import contextlib
+import datetime
+import functools
+import json
+import threading
+import time
+import tracemalloc
+from typing import TYPE_CHECKING, Callable, Dict, Iterator, List, Optional, Tuple, Union
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+MAX_SHAPES = 10
+
+
+class _State:
+    enabled = False
+    trace_memory = False
+    profile: Optional["Profile"] = None
+
+
+_state = _State()
+_local = threading.local()
+
+
+class _Frame:
+    __slots__ = ("path", "start", "child_time", "mem_start", "max_peak")
+
+    def __init__(self, path: Tuple[str, ...]) -> None:
+        self.path = path
+        self.start = 0.0
+        self.child_time = 0.0
+        self.mem_start = 0
+        self.max_peak = 0
+
+
+class Profile:
+    """Aggregated measurements of one instrumented run."""
+
+    def __init__(self, trace_memory: bool = False) -> None:
+        self.trace_memory = trace_memory
+        self.started = datetime.datetime.now().isoformat(timespec="seconds")
+        self.wall_time = 0.0
+        self._lock = threading.Lock()
+        self._stages: Dict[str, dict] = {}
+        self._paths: Dict[Tuple[str, ...], dict] = {}
+
+    def _record(
+        self,
+        path: Tuple[str, ...],
+        elapsed: float,
+        self_time: float,
+        peak: Optional[int],
+        shapes: Optional[str],
+    ) -> None:
+        name = path[-1]
+        with self._lock:
+            stage = self._stages.get(name)
+            if stage is None:
+                stage = self._stages[name] = {
+                    "calls": 0,
+                    "total_s": 0.0,
+                    "self_s": 0.0,
+                    "max_s": 0.0,
+                    "peak_bytes": None,
+                    "shapes": [],
+                }
+            stage["calls"] += 1
+            stage["total_s"] += elapsed
+            stage["self_s"] += self_time
+            stage["max_s"] = max(stage["max_s"], elapsed)
+            if peak is not None:
+                stage["peak_bytes"] = max(stage["peak_bytes"] or 0, peak)
+            if shapes and shapes not in stage["shapes"] and len(stage["shapes"]) < MAX_SHAPES:
+                stage["shapes"].append(shapes)
+
+            entry = self._paths.get(path)
+            if entry is None:
+                entry = self._paths[path] = {"calls": 0, "total_s": 0.0, "self_s": 0.0}
+            entry["calls"] += 1
+            entry["total_s"] += elapsed
+            entry["self_s"] += self_time
+
+    def stages(self) -> pd.DataFrame:
+        """One row per instrumented stage, slowest first."""
+        import pandas as pd
+
+        with self._lock:
+            table = pd.DataFrame.from_dict(self._stages, orient="index")
+        if table.empty:
+            return table
+        table["mean_s"] = table["total_s"] / table["calls"]
+        return table.sort_values("total_s", ascending=False)
+
+    def to_dict(self) -> dict:
+        with self._lock:
+            return {
+                "started": self.started,
+                "wall_time_s": self.wall_time,
+                "trace_memory": self.trace_memory,
+                "stages": {name: dict(stage) for name, stage in self._stages.items()},
+                "paths": [
+                    {"path": ";".join(path), **entry}
+                    for path, entry in sorted(self._paths.items())
+                ],
+            }
+
+    def to_json(self, path: str) -> None:
+        with open(path, "w") as f:
+            json.dump(self.to_dict(), f, indent=2)
+
+    def collapsed(self) -> List[str]:
+        """Collapsed stacks: ``outer;inner <self time in microseconds>``."""
+        with self._lock:
+            return [
+                f"{';'.join(path)} {int(round(entry['self_s'] * 1e6))}"
+                for path, entry in sorted(self._paths.items())
+            ]
+
+    def to_collapsed(self, path: str) -> None:
+        """Write collapsed stacks, as read by ``flamegraph.pl`` or speedscope."""
+        with open(path, "w") as f:
+            f.write("\n".join(self.collapsed()) + "\n")
+
+
+def _stack() -> List[_Frame]:
+    stack = getattr(_local, "stack", None)
+    if stack is None:
+        stack = _local.stack = []
+    return stack
+
+
+def _shapes(args, kwargs) -> Optional[str]:
+    shapes = [
+        repr(tuple(value.shape))
+        for value in list(args) + list(kwargs.values())
+        if hasattr(value, "shape") and hasattr(value, "ndim")
+    ]
+    return ", ".join(shapes) if shapes else None
+
+
+@contextlib.contextmanager
+def _measure(name: str, shapes: Optional[str] = None) -> Iterator[None]:
+    prof = _state.profile
+    stack = _stack()
+    parent = stack[-1] if stack else None
+    frame = _Frame(parent.path + (name,) if parent else (name,))
+    memory = _state.trace_memory and tracemalloc.is_tracing()
+    if memory:
+        # Each frame resets the peak and hands the peak it saw up to its
+        # parent, so nested stages each get their own high-water mark.
+        frame.mem_start, peak_before = tracemalloc.get_traced_memory()
+        if parent is not None:
+            parent.max_peak = max(parent.max_peak, peak_before)
+        tracemalloc.reset_peak()
+    stack.append(frame)
+    frame.start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - frame.start
+        stack.pop()
+        peak = None
+        if memory:
+            _, peak_now = tracemalloc.get_traced_memory()
+            frame.max_peak = max(frame.max_peak, peak_now)
+            peak = max(frame.max_peak - frame.mem_start, 0)
+            if parent is not None:
+                parent.max_peak = max(parent.max_peak, frame.max_peak)
+        if parent is not None:
+            parent.child_time += elapsed
+        if prof is not None:
+            prof._record(frame.path, elapsed, elapsed - frame.child_time, peak, shapes)
+
+
+def instrument(func: Optional[Callable] = None, *, name: Optional[str] = None) -> Callable:
+    """Record calls to ``func`` while a :func:`profile` is active.
+
+    Use as ``@instrument`` or ``@instrument(name="stage")``.  The stage
+    name defaults to ``<module>.<function>`` without the package prefix.
+    """
+
+    def decorate(function: Callable) -> Callable:
+        label = name or f"{function.__module__.rsplit('.', 1)[-1]}.{function.__qualname__}"
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if not _state.enabled:
+                return function(*args, **kwargs)
+            with _measure(label, _shapes(args, kwargs)):
+                return function(*args, **kwargs)
+
+        return wrapper
+
+    return decorate(func) if func is not None else decorate
+
+
+def stage(name: str):
+    """Context manager recording an ad-hoc block as a stage."""
+    if not _state.enabled:
+        return contextlib.nullcontext()
+    return _measure(name)
+
+
+def is_enabled() -> bool:
+    return _state.enabled
+
+
+@contextlib.contextmanager
+def profile(trace_memory: bool = False) -> Iterator[Profile]:
+    """Instrument everything run inside the block and collect a :class:`Profile`.
+
+    ``trace_memory`` turns on :mod:`tracemalloc` for the block, which
+    records peak allocations (including NumPy buffers) at the cost of
+    slower allocation.  Memory attribution is per process, so stages
+    running concurrently in threads see each other's allocations.
+    """
+    previous = (_state.enabled, _state.trace_memory, _state.profile)
+    prof = Profile(trace_memory)
+    started_tracing = trace_memory and not tracemalloc.is_tracing()
+    if started_tracing:
+        tracemalloc.start()
+    _state.enabled, _state.trace_memory, _state.profile = True, trace_memory, prof
+    start = time.perf_counter()
+    try:
+        yield prof
+    finally:
+        prof.wall_time = time.perf_counter() - start
+        _state.enabled, _state.trace_memory, _state.profile = previous
+        if started_tracing:
+            tracemalloc.stop()
+
+
+def _load(source: Union[Profile, dict, str]) -> dict:
+    if isinstance(source, Profile):
+        return source.to_dict()
+    if isinstance(source, str):
+        with open(source) as f:
+            return json.load(f)
+    return source
+
+
+def diff_profiles(
+    before: Union[Profile, dict, str], after: Union[Profile, dict, str]
+) -> pd.DataFrame:
+    """Compare per-stage totals of two profiles (objects, dicts or JSON files)."""
+    import pandas as pd
+
+    frames = {}
+    for label, source in (("before", before), ("after", after)):
+        stages = _load(source)["stages"]
+        frames[label] = pd.DataFrame.from_dict(stages, orient="index")[
+            ["calls", "total_s", "peak_bytes"]
+        ]
+    table = frames["before"].join(
+        frames["after"], how="outer", lsuffix="_before", rsuffix="_after"
+    )
+    table["total_ratio"] = table["total_s_after"] / table["total_s_before"]
+    return table.sort_values("total_s_after", ascending=False)
+
+
+__all__ = [
+    "Profile",
+    "instrument",
+    "stage",
+    "profile",
+    "is_enabled",
+    "diff_profiles",
+]
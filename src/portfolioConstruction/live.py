@@ -0,0 +1,445 @@
+"""Incremental daily updates of selections, weights and risk.
+
+The batch entry points recompute everything from the full history: the
+momentum selector calls ``pct_change(window)`` over the whole frame,
+:func:`predict_returns` and :func:`select_equities` refit on every row and
+:func:`evaluate_risk` re-sorts all returns.  The classes below keep just
+the state those computations need, so appending one observation costs the
+same however long the history is:
+
+* :class:`LiveMomentum` keeps the last ``window + 1`` prices
+  (:func:`select_alternatives`);
+* :class:`LiveFixedIncome` keeps the previous spreads
+  (:func:`select_fixed_income`);
+* :class:`LiveFactorModel` keeps regression sufficient statistics and
+  return moments (:func:`predict_returns`, :func:`select_equities`);
+* :class:`LiveRisk` keeps a sorted window of realised portfolio returns
+  (:class:`RollingTailRisk`).
+
+:class:`LivePortfolio` combines them: each :meth:`LivePortfolio.update`
+books the realised return of the held weights, refreshes the sleeve
+selections, re-solves the constrained mean-variance weights (warm started
+from the previous solution) and reports risk.  With an expanding window
+the selections and forecasts equal those of the batch functions applied
+to the full history up to the same date.
+"""
+
+from __future__ import annotations
+
+from collections import deque
+from typing import Dict, List, NamedTuple, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from ._least_squares import RollingOLS
+from .asset_allocation_ml import MeanVarianceRebalancer
+from .barra_equity_selector import optimize_selection
+from .factor_covariance import FactorCovariance, portfolio_variance
+from .instrumentation import instrument
+from .risk_management import RollingTailRisk, apply_volatility_targeting, check_limits
+
+# Round-off allowed on the solver's weights before a limit counts as breached.
+_LIMIT_TOLERANCE = 1e-9
+
+
+def _row(values, columns: pd.Index, what: str) -> np.ndarray:
+    if isinstance(values, pd.Series):
+        values = values.reindex(columns)
+    values = np.asarray(values, dtype=float)
+    if values.shape != (len(columns),):
+        raise ValueError(f"{what} row must have one value per column")
+    return values
+
+
+class LiveMomentum:
+    """Streaming version of :func:`select_alternatives`.
+
+    Parameters
+    ----------
+    assets : sequence
+        Asset labels, in the order of the price rows.
+    window : int, optional
+        Momentum look-back, by default 60.
+    top_n : int, optional
+        Number of assets selected, by default 5.
+    """
+
+    def __init__(self, assets: Sequence, window: int = 60, top_n: int = 5) -> None:
+        self.assets = pd.Index(assets)
+        self.window = window
+        self.top_n = top_n
+        self._prices: deque = deque(maxlen=window + 1)
+        self.momentum = pd.Series(np.nan, index=self.assets)
+
+    def update(self, prices) -> List[str]:
+        """Add one row of prices and return the current selection."""
+        self._prices.append(_row(prices, self.assets, "Price"))
+        if len(self._prices) > self.window:
+            values = self._prices[-1] / self._prices[0] - 1.0
+            self.momentum = pd.Series(values, index=self.assets)
+        return list(self.momentum.nlargest(self.top_n).index)
+
+
+class LiveFixedIncome:
+    """Streaming version of :func:`select_fixed_income`."""
+
+    def __init__(self, bonds: Sequence, top_n: int = 10) -> None:
+        self.bonds = pd.Index(bonds)
+        self.top_n = top_n
+        self._previous_spreads: Optional[np.ndarray] = None
+        self.score = pd.Series(np.nan, index=self.bonds)
+
+    def update(self, yields, credit_spreads) -> List[str]:
+        """Add one row of yields and spreads and return the selection."""
+        y = _row(yields, self.bonds, "Yield")
+        s = _row(credit_spreads, self.bonds, "Spread")
+        if self._previous_spreads is not None:
+            self.score = pd.Series(y - (s - self._previous_spreads), index=self.bonds)
+        self._previous_spreads = s
+        return list(self.score.nlargest(self.top_n).index)
+
+
+class LiveFactorModel:
+    """Regression and covariance state for a panel of asset returns.
+
+    Two sets of sufficient statistics are updated per row:
+
+    * the return forecast of :func:`predict_returns`: returns regressed on
+      factors with an intercept over the rows before the latest one, plus
+      the return moments of those rows for the sample covariance;
+    * the factor model of :func:`fit_factor_model`: returns regressed on
+      same-day factors without intercept, plus factor moments.
+
+    Parameters
+    ----------
+    assets, factors : sequence
+        Asset and factor labels.
+    window : int | None, optional
+        Number of most recent rows used; ``None`` uses all rows, by
+        default None.
+    sample_covariance : bool, optional
+        Track the N x N return moments needed for
+        :meth:`sample_covariance`; turn off for large universes and use
+        :meth:`factor_covariance_model` instead, by default True.
+    """
+
+    def __init__(
+        self,
+        assets: Sequence,
+        factors: Sequence,
+        window: Optional[int] = None,
+        sample_covariance: bool = True,
+    ) -> None:
+        self.assets = pd.Index(assets)
+        self.factors = pd.Index(factors)
+        self.window = window
+        n_assets, n_factors = len(self.assets), len(self.factors)
+        self._forecast = RollingOLS(n_factors + 1, n_assets)
+        self._exposure = RollingOLS(n_factors, n_assets)
+        self._sum_f = np.zeros(n_factors)
+        self._sum_ff = np.zeros((n_factors, n_factors))
+        self._track_cov = sample_covariance
+        if sample_covariance:
+            self._sum_rr = np.zeros((n_assets, n_assets))
+        # Rows still inside either window: ``window + 1`` at most.
+        self._rows: deque = deque()
+        self._latest_factors: Optional[np.ndarray] = None
+        self.n_obs = 0
+
+    def _add_training(self, x: np.ndarray, r: np.ndarray, sign: float) -> None:
+        if sign > 0:
+            self._forecast.add(np.r_[1.0, x], r)
+        else:
+            self._forecast.remove(np.r_[1.0, x], r)
+        if self._track_cov:
+            self._sum_rr += sign * np.outer(r, r)
+
+    def _add_exposure(self, x: np.ndarray, r: np.ndarray, sign: float) -> None:
+        if sign > 0:
+            self._exposure.add(x, r)
+        else:
+            self._exposure.remove(x, r)
+        self._sum_f += sign * x
+        self._sum_ff += sign * np.outer(x, x)
+
+    def update(self, returns, factor_returns) -> None:
+        """Add one row of asset returns and the same day's factor returns."""
+        r = _row(returns, self.assets, "Return")
+        x = _row(factor_returns, self.factors, "Factor")
+        if not (np.isfinite(r).all() and np.isfinite(x).all()):
+            raise ValueError("Live updates need complete return and factor rows")
+
+        if self._rows:
+            # The previous row becomes training data for the forecast.
+            self._add_training(*self._rows[-1], 1.0)
+        self._add_exposure(x, r, 1.0)
+        self._rows.append((x, r))
+        self.n_obs += 1
+
+        # The factor model uses the last ``window`` rows including today;
+        # the forecast the ``window`` rows before today.
+        if self.window is not None and len(self._rows) > self.window:
+            self._add_exposure(*self._rows[-self.window - 1], -1.0)
+            self.n_obs -= 1
+            if len(self._rows) > self.window + 1:
+                self._add_training(*self._rows.popleft(), -1.0)
+        elif self.window is None and len(self._rows) > 1:
+            self._rows.popleft()
+        self._latest_factors = x
+
+    @property
+    def forecast_obs(self) -> int:
+        """Number of rows the return forecast is trained on."""
+        return self._forecast.n_obs
+
+    def expected_returns(self) -> pd.Series:
+        """Next-period forecast, as the last row of :func:`predict_returns`."""
+        if self._forecast.n_obs == 0:
+            return pd.Series(np.nan, index=self.assets)
+        coef = self._forecast.coef()
+        return pd.Series(np.r_[1.0, self._latest_factors] @ coef, index=self.assets)
+
+    def sample_covariance(self, assets: Optional[Sequence] = None) -> np.ndarray:
+        """Sample covariance of the training returns (``ddof=1``)."""
+        if not self._track_cov:
+            raise ValueError("Sample covariance is not tracked; use factor_covariance_model")
+        idx = slice(None) if assets is None else self.assets.get_indexer(assets)
+        n = self._forecast.n_obs
+        if n < 2:
+            size = len(self.assets) if assets is None else len(idx)
+            return np.full((size, size), np.nan)
+        mean = self._forecast.sum_y[idx] / n
+        second = self._sum_rr[np.ix_(idx, idx)] if assets is not None else self._sum_rr
+        return (second - n * np.outer(mean, mean)) / (n - 1)
+
+    def exposures(self) -> pd.DataFrame:
+        return pd.DataFrame(self._exposure.coef().T, index=self.assets, columns=self.factors)
+
+    def idiosyncratic_risk(self) -> pd.Series:
+        coef = self._exposure.coef()
+        return pd.Series(self._exposure.residual_variance(coef), index=self.assets)
+
+    def factor_covariance(self) -> pd.DataFrame:
+        n = self.n_obs
+        mean = self._sum_f / n
+        cov = (self._sum_ff - n * np.outer(mean, mean)) / (n - 1)
+        return pd.DataFrame(cov, index=self.factors, columns=self.factors)
+
+    def factor_covariance_model(self, assets: Optional[Sequence] = None) -> FactorCovariance:
+        """Asset covariance ``B F Bᵀ + diag(D)`` from the live factor model."""
+        exposures = self.exposures()
+        idio = self.idiosyncratic_risk()
+        if assets is not None:
+            exposures = exposures.loc[assets]
+            idio = idio.loc[assets]
+        return FactorCovariance.from_barra(exposures, self.factor_covariance(), idio)
+
+
+class LiveRisk:
+    """Rolling VaR, CVaR and volatility of realised portfolio returns."""
+
+    def __init__(self, window: Optional[int] = 250, confidence_level: float = 0.95) -> None:
+        self.tail = RollingTailRisk(window, confidence_level)
+        self.window = window
+        self._returns: deque = deque()
+        self._sum = 0.0
+        self._sum_sq = 0.0
+
+    def update(self, portfolio_return: float) -> Dict[str, float]:
+        value = float(portfolio_return)
+        if not np.isnan(value):
+            self.tail.update(value)
+            self._returns.append(value)
+            self._sum += value
+            self._sum_sq += value * value
+            if self.window is not None and len(self._returns) > self.window:
+                old = self._returns.popleft()
+                self._sum -= old
+                self._sum_sq -= old * old
+        return self.metrics()
+
+    def metrics(self) -> Dict[str, float]:
+        n = len(self._returns)
+        volatility = np.nan
+        if n > 1:
+            volatility = float(np.sqrt(max(self._sum_sq - self._sum**2 / n, 0.0) / (n - 1)))
+        return {"var": self.tail.var(), "cvar": self.tail.cvar(), "volatility": volatility}
+
+
+class LiveSnapshot(NamedTuple):
+    """State of a :class:`LivePortfolio` after an update."""
+
+    date: object
+    selections: Dict[str, List[str]]
+    expected_returns: pd.Series
+    weights: pd.Series
+    risk: Dict[str, object]
+
+
+class LivePortfolio:
+    """Selections, weights and risk refreshed one observation at a time.
+
+    The allocation universe is the union of the equity, alternatives and
+    fixed income selections that appear in ``assets`` (the columns of the
+    return rows); alternatives and bonds outside it are still selected and
+    reported but not allocated to.
+
+    Parameters
+    ----------
+    assets, factors : sequence
+        Labels of the return and factor rows passed to :meth:`update`.
+    window : int | None, optional
+        Estimation window of the factor model, by default None (expanding).
+    equity_top_n : int, optional
+        Assets picked by the factor-model selection, by default 10.
+    alternatives, bonds : sequence | None, optional
+        Labels of the price rows and yield/spread rows, if those sleeves
+        are used.
+    alternatives_window, alternatives_top_n, fixed_income_top_n : int
+        Parameters of the alternatives and fixed income sleeves.
+    risk_aversion, weight_limit, leverage_limit, turnover_penalty : float
+        Parameters of the constrained mean-variance allocation (see
+        :class:`MeanVarianceRebalancer`); the weight limit is raised to
+        ``1 / n`` when fewer assets are selected.  Turnover is penalised
+        from the second allocation on.
+    target_volatility : float | None, optional
+        Scale the weights to this ex-ante volatility, by default None.
+    covariance : {"sample", "factor"}, optional
+        Allocate with the sample covariance (as :func:`predict_returns`)
+        or the factor-model covariance, which keeps each update
+        ``O(N·k²)`` instead of ``O(N²)``, by default "sample".
+    confidence_level : float, optional
+        VaR/CVaR confidence level, by default 0.95.
+    risk_window : int | None, optional
+        Number of realised returns in the risk window, by default 250.
+    """
+
+    def __init__(
+        self,
+        assets: Sequence,
+        factors: Sequence,
+        window: Optional[int] = None,
+        equity_top_n: int = 10,
+        alternatives: Optional[Sequence] = None,
+        bonds: Optional[Sequence] = None,
+        alternatives_window: int = 60,
+        alternatives_top_n: int = 5,
+        fixed_income_top_n: int = 10,
+        risk_aversion: float = 1.0,
+        weight_limit: float = 0.2,
+        leverage_limit: float = 1.0,
+        turnover_penalty: float = 0.0,
+        target_volatility: Optional[float] = None,
+        covariance: str = "sample",
+        confidence_level: float = 0.95,
+        risk_window: Optional[int] = 250,
+    ) -> None:
+        if covariance not in ("sample", "factor"):
+            raise ValueError("covariance must be 'sample' or 'factor'")
+        self.assets = pd.Index(assets)
+        self.model = LiveFactorModel(
+            assets, factors, window, sample_covariance=covariance == "sample"
+        )
+        self.momentum = (
+            LiveMomentum(alternatives, alternatives_window, alternatives_top_n)
+            if alternatives is not None
+            else None
+        )
+        self.fixed_income = (
+            LiveFixedIncome(bonds, fixed_income_top_n) if bonds is not None else None
+        )
+        self.risk = LiveRisk(risk_window, confidence_level)
+        self.rebalancer = MeanVarianceRebalancer(
+            risk_aversion=risk_aversion,
+            weight_limit=weight_limit,
+            leverage_limit=max(leverage_limit, 1.0),
+            turnover_penalty=turnover_penalty,
+        )
+        self.equity_top_n = equity_top_n
+        self.risk_aversion = risk_aversion
+        self.weight_limit = weight_limit
+        self.leverage_limit = leverage_limit
+        self.target_volatility = target_volatility
+        self.covariance = covariance
+        self.weights = pd.Series(dtype=float)
+        self.selections: Dict[str, List[str]] = {}
+
+    def _select_equities(self) -> List[str]:
+        model = self.model
+        if model.n_obs <= len(model.factors) or model.forecast_obs == 0:
+            return []
+        return optimize_selection(
+            expected_returns=model.expected_returns(),
+            exposures=model.exposures(),
+            factor_cov=model.factor_covariance(),
+            idiosyncratic_risk=model.idiosyncratic_risk(),
+            risk_aversion=self.risk_aversion,
+            top_n=self.equity_top_n,
+        )
+
+    @instrument(name="live.LivePortfolio.update")
+    def update(
+        self,
+        returns,
+        factor_returns,
+        prices=None,
+        yields=None,
+        credit_spreads=None,
+        date=None,
+    ) -> LiveSnapshot:
+        """Append one observation and refresh selections, weights and risk.
+
+        ``returns`` are the asset returns realised since the last update;
+        they are first applied to the weights chosen last time to book the
+        portfolio return.  ``prices`` (alternatives) and ``yields`` /
+        ``credit_spreads`` (bonds) are only needed when those sleeves were
+        configured.
+        """
+        if date is None and isinstance(returns, pd.Series):
+            date = returns.name
+        r = _row(returns, self.assets, "Return")
+        if len(self.weights):
+            held = self.assets.get_indexer(self.weights.index)
+            self.risk.update(float(r[held] @ self.weights.values))
+        self.model.update(r, factor_returns)
+
+        selections = {"equities": self._select_equities()}
+        if self.momentum is not None and prices is not None:
+            selections["alternatives"] = self.momentum.update(prices)
+        if self.fixed_income is not None and yields is not None:
+            selections["fixed_income"] = self.fixed_income.update(yields, credit_spreads)
+        self.selections = selections
+
+        universe = [a for a in dict.fromkeys(sum(selections.values(), [])) if a in self.assets]
+        mu = self.model.expected_returns().reindex(universe)
+        risk: Dict[str, object] = self.risk.metrics()
+        if universe and self.model.forecast_obs > 1 and mu.notna().all():
+            if self.covariance == "sample":
+                cov = self.model.sample_covariance(universe)
+            else:
+                cov = self.model.factor_covariance_model(universe)
+            self.rebalancer.weight_limit = max(self.weight_limit, 1.0 / len(universe))
+            weights = self.rebalancer.rebalance(mu, cov).values
+            if self.target_volatility is not None:
+                weights = apply_volatility_targeting(
+                    weights, None, self.target_volatility, covariance=cov
+                )
+            self.weights = pd.Series(weights, index=universe)
+            risk["ex_ante_volatility"] = float(np.sqrt(portfolio_variance(weights, cov)))
+            risk["limit_breaches"] = check_limits(
+                weights,
+                self.rebalancer.weight_limit + _LIMIT_TOLERANCE,
+                self.rebalancer.leverage_limit + _LIMIT_TOLERANCE,
+            )
+        return LiveSnapshot(date, selections, mu, self.weights, risk)
+
+
+__all__ = [
+    "LiveMomentum",
+    "LiveFixedIncome",
+    "LiveFactorModel",
+    "LiveRisk",
+    "LiveSnapshot",
+    "LivePortfolio",
+]
@@ -0,0 +1,319 @@
+"""Content-addressed memoisation of expensive estimators.
+
+Parameter sweeps (``top_n``, ``risk_aversion``, ...) call the same
+estimators on identical data over and over.  :func:`memoize` caches an
+estimator's result under a hash of the *contents* of its array and frame
+arguments plus its other parameters, so an identical call returns the
+stored result no matter which object the data arrives in.  Arguments are
+bound to the function's signature first, so positional, keyword and
+defaulted forms of the same call share a key.
+
+Caching is off by default: every call hashes its inputs, which costs a
+pass over the data, and results are held for the life of the process.
+Turn it on around a sweep with ``configure_cache(enabled=True)``.
+
+Results live in an in-memory LRU bounded by a byte budget.  Entries
+evicted from memory can optionally spill to a disk folder, from which
+they are reloaded on a later hit.  Cached values are copied on the way
+out, so callers may modify what they receive; memoised estimators should
+therefore return small per-asset results rather than full panels.
+"""
+
+from __future__ import annotations
+
+import functools
+import hashlib
+import inspect
+import os
+import pickle
+import sys
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_MAX_BYTES = 256 * 1024**2
+
+
+def _hash_array(digest, values: np.ndarray) -> None:
+    digest.update(repr((values.dtype.str, values.shape)).encode())
+    if values.dtype.kind == "O":
+        digest.update(pd.util.hash_array(values.ravel()).tobytes())
+        return
+    # Row-major bytes, so the memory layout does not change the key.
+    digest.update(np.ascontiguousarray(values).view(np.uint8).ravel())
+
+
+def _hash_index(digest, index: pd.Index) -> None:
+    digest.update(repr(list(index.names)).encode())
+    if isinstance(index, pd.MultiIndex) or index.dtype.kind == "O":
+        digest.update(pd.util.hash_pandas_object(index).values.tobytes())
+    else:
+        _hash_array(digest, np.asarray(index))
+
+
+def fingerprint(*parts) -> str:
+    """Hash of data frames, series, arrays and plain parameters.
+
+    Numeric data is hashed from its raw buffer, so the cost is a single
+    pass over memory.  Other parameters contribute their ``repr``.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    for part in parts:
+        if isinstance(part, pd.DataFrame):
+            digest.update(b"frame")
+            _hash_index(digest, part.index)
+            _hash_index(digest, part.columns)
+            if part.dtypes.map(lambda d: d.kind in "biufcmM").all():
+                _hash_array(digest, part.values)
+            else:
+                digest.update(pd.util.hash_pandas_object(part, index=False).values.tobytes())
+        elif isinstance(part, pd.Series):
+            digest.update(b"series")
+            digest.update(repr(part.name).encode())
+            _hash_index(digest, part.index)
+            _hash_array(digest, part.values)
+        elif isinstance(part, np.ndarray):
+            digest.update(b"array")
+            _hash_array(digest, part)
+        elif isinstance(part, (tuple, list)):
+            digest.update(f"{type(part).__name__}{len(part)}".encode())
+            digest.update(fingerprint(*part).encode())
+        elif isinstance(part, dict):
+            digest.update(b"dict")
+            digest.update(fingerprint(*sorted(part.items(), key=lambda kv: repr(kv[0]))).encode())
+        else:
+            digest.update(repr(part).encode())
+        digest.update(b"|")
+    return digest.hexdigest()
+
+
+def _nbytes(value) -> int:
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        return int(np.sum(value.memory_usage(index=True, deep=False)))
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if isinstance(value, tuple):
+        return sum(_nbytes(v) for v in value)
+    return sys.getsizeof(value)
+
+
+def _copy(value):
+    if isinstance(value, (pd.DataFrame, pd.Series, np.ndarray)):
+        return value.copy()
+    if isinstance(value, tuple) and hasattr(value, "_fields"):
+        return type(value)(*(_copy(v) for v in value))
+    if isinstance(value, tuple):
+        return tuple(_copy(v) for v in value)
+    if isinstance(value, (list, dict)):
+        return pickle.loads(pickle.dumps(value))
+    return value
+
+
+class EstimatorCache:
+    """LRU cache of estimator results with a byte budget.
+
+    Parameters
+    ----------
+    max_bytes : int, optional
+        Memory budget for cached results, by default 256 MiB.  The least
+        recently used entries are evicted to stay within it; a single
+        result larger than the budget is not kept in memory.
+    disk_dir : str | None, optional
+        Folder to spill evicted entries to.  Spilled entries are loaded
+        back (and promoted to memory) on a hit.  By default entries are
+        simply dropped.
+    enabled : bool, optional
+        Whether memoised functions use the cache, by default True.
+    """
+
+    def __init__(
+        self,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        disk_dir: Optional[str] = None,
+        enabled: bool = True,
+    ) -> None:
+        self.max_bytes = max_bytes
+        self.disk_dir = disk_dir
+        self.enabled = enabled
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.RLock()
+        self._stats: Dict[str, Dict[str, int]] = {}
+        if disk_dir is not None:
+            os.makedirs(disk_dir, exist_ok=True)
+
+    @property
+    def nbytes(self) -> int:
+        return self._bytes
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _count(self, name: str, event: str) -> None:
+        counts = self._stats.setdefault(
+            name, {"hits": 0, "disk_hits": 0, "misses": 0, "evictions": 0}
+        )
+        counts[event] += 1
+
+    def _disk_path(self, key: str) -> str:
+        return os.path.join(self.disk_dir, f"{key}.pkl")
+
+    def get(self, name: str, key: str):
+        """Return ``(True, value)`` on a hit and ``(False, None)`` otherwise."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self._count(name, "hits")
+                return True, entry[0]
+        if self.disk_dir is not None:
+            try:
+                with open(self._disk_path(key), "rb") as f:
+                    value = pickle.load(f)
+            except (OSError, pickle.UnpicklingError, EOFError):
+                pass
+            else:
+                with self._lock:
+                    self._count(name, "disk_hits")
+                self.put(name, key, value)
+                return True, value
+        with self._lock:
+            self._count(name, "misses")
+        return False, None
+
+    def put(self, name: str, key: str, value) -> None:
+        size = _nbytes(value)
+        spilled = []
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old[1]
+            if size > self.max_bytes:
+                spilled.append((key, value))
+            else:
+                self._entries[key] = (value, size, name)
+                self._bytes += size
+                while self._bytes > self.max_bytes:
+                    old_key, (old_value, old_size, old_name) = self._entries.popitem(last=False)
+                    self._bytes -= old_size
+                    self._count(old_name, "evictions")
+                    spilled.append((old_key, old_value))
+        if self.disk_dir is not None:
+            for old_key, old_value in spilled:
+                path = self._disk_path(old_key)
+                if os.path.exists(path):
+                    continue
+                tmp_path = f"{path}.tmp{os.getpid()}.{threading.get_ident()}"
+                with open(tmp_path, "wb") as f:
+                    pickle.dump(old_value, f, protocol=pickle.HIGHEST_PROTOCOL)
+                os.replace(tmp_path, path)
+
+    def clear(self, disk: bool = False) -> None:
+        """Drop all in-memory entries and statistics (and the disk tier)."""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            self._stats.clear()
+        if disk and self.disk_dir is not None:
+            for file_name in os.listdir(self.disk_dir):
+                if file_name.endswith(".pkl"):
+                    os.remove(os.path.join(self.disk_dir, file_name))
+
+    def stats(self) -> pd.DataFrame:
+        """Hits, disk hits, misses, evictions and hit rate per estimator."""
+        with self._lock:
+            table = pd.DataFrame.from_dict(self._stats, orient="index")
+        if table.empty:
+            return pd.DataFrame(
+                columns=["hits", "disk_hits", "misses", "evictions", "hit_rate"]
+            )
+        calls = table[["hits", "disk_hits", "misses"]].sum(axis=1)
+        table["hit_rate"] = (table["hits"] + table["disk_hits"]) / calls
+        return table.sort_index()
+
+
+# Disabled until configure_cache(enabled=True).
+default_cache = EstimatorCache(enabled=False)
+
+
+def memoize(
+    func: Optional[Callable] = None,
+    *,
+    cache: Optional[EstimatorCache] = None,
+    name: Optional[str] = None,
+) -> Callable:
+    """Cache a function's results keyed on the contents of its arguments.
+
+    Can be used as ``@memoize`` or ``@memoize(cache=..., name=...)``.  The
+    wrapped function has a ``cache_key(*args, **kwargs)`` method and the
+    original function is available as ``__wrapped__``.
+    """
+
+    def decorate(function: Callable) -> Callable:
+        label = name or f"{function.__module__}.{function.__qualname__}"
+        signature = inspect.signature(function)
+
+        def cache_key(*args, **kwargs) -> str:
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            return fingerprint(label, *bound.arguments.items())
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            store = cache if cache is not None else default_cache
+            if not store.enabled:
+                return function(*args, **kwargs)
+            key = cache_key(*args, **kwargs)
+            hit, value = store.get(label, key)
+            if not hit:
+                value = function(*args, **kwargs)
+                store.put(label, key, value)
+            return _copy(value)
+
+        wrapper.cache_key = cache_key
+        return wrapper
+
+    return decorate(func) if func is not None else decorate
+
+
+def configure_cache(
+    max_bytes: Optional[int] = None,
+    disk_dir: Optional[str] = None,
+    enabled: Optional[bool] = None,
+) -> EstimatorCache:
+    """Adjust the budget, disk tier or on/off switch of the default cache.
+
+    The default cache starts disabled; ``configure_cache(enabled=True)``
+    turns memoisation on.
+    """
+    if max_bytes is not None:
+        default_cache.max_bytes = max_bytes
+    if disk_dir is not None:
+        os.makedirs(disk_dir, exist_ok=True)
+        default_cache.disk_dir = disk_dir
+    if enabled is not None:
+        default_cache.enabled = enabled
+    return default_cache
+
+
+def cache_stats() -> pd.DataFrame:
+    """Hit/miss statistics of the default cache."""
+    return default_cache.stats()
+
+
+def clear_cache(disk: bool = False) -> None:
+    default_cache.clear(disk=disk)
+
+
+__all__ = [
+    "EstimatorCache",
+    "default_cache",
+    "fingerprint",
+    "memoize",
+    "configure_cache",
+    "cache_stats",
+    "clear_cache",
+]
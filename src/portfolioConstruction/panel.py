@@ -0,0 +1,459 @@
+"""Out-of-core return and price panels processed in asset-column chunks.
+
+The selectors and risk functions of this package take float64 DataFrames
+that hold the whole history in memory, and several of them build
+temporaries of the same size (``factor_returns.dot(exposures.T)``,
+``returns - common``, ``prices.pct_change``).  For decades of daily data on
+a large universe that does not fit.
+
+A :class:`Panel` stores a dates x assets array as a memory-mapped ``.npy``
+file, float32 by default, next to its date and asset labels.  The file is
+written in column-major order so a block of asset columns is contiguous on
+disk.  The functions below walk a panel one block of columns at a time,
+convert each block to float64 and only keep per-asset results (or small
+per-date accumulators) in memory:
+
+* :func:`panel_factor_model` and :func:`panel_idiosyncratic_risk` --
+  :func:`fit_factor_model` and :func:`compute_idiosyncratic_risk`;
+* :func:`panel_momentum` and :func:`panel_select_alternatives` --
+  ``prices.pct_change(window)`` and :func:`select_alternatives`;
+* :func:`panel_portfolio_returns` and :func:`panel_evaluate_risk` --
+  :func:`evaluate_risk_batch`.
+
+Assets are independent in all of these, so the results do not depend on
+the chunk size and equal the in-memory functions applied to the float32
+values.  Once a selection has been made, ``panel.to_frame(columns=...)``
+loads just those assets for the in-memory allocation functions::
+
+    returns = Panel.from_frame(frame, "output/panels/returns")
+    fit = panel_factor_model(returns, factor_returns)
+    risk = panel_evaluate_risk(weights, returns)
+"""
+
+from __future__ import annotations
+
+import json
+import os
+from typing import Dict, Iterator, List, NamedTuple, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from ._least_squares import batched_lstsq, column_variance
+from .barra_equity_selector import optimize_selection
+from .factor_covariance import CovarianceLike
+from .instrumentation import instrument
+from .risk_management import _risk_from_portfolio_returns
+
+DEFAULT_DTYPE = np.float32
+# Size of the float64 working copy of one column block.
+DEFAULT_CHUNK_BYTES = 64 * 2**20
+
+_VALUES, _DATES, _ASSETS, _META = "values.npy", "dates.npy", "assets.npy", "meta.json"
+
+
+def _save_labels(path: str, index: pd.Index) -> None:
+    values = np.asarray(index)
+    if values.dtype == object or isinstance(index.dtype, pd.StringDtype):
+        values = values.astype(str)
+    np.save(path, values, allow_pickle=False)
+
+
+class Panel:
+    """A dates x assets array with labels, usually memory-mapped from disk.
+
+    Parameters
+    ----------
+    values : numpy.ndarray
+        Array of shape ``(dates, assets)``; typically a
+        :class:`numpy.memmap` returned by :meth:`open` or :meth:`create`.
+    index, columns : pandas.Index
+        Date and asset labels.
+    path : str | None, optional
+        Directory the panel is stored in, by default None (in memory).
+    """
+
+    def __init__(
+        self,
+        values: np.ndarray,
+        index: pd.Index,
+        columns: pd.Index,
+        path: Optional[str] = None,
+    ) -> None:
+        if values.shape != (len(index), len(columns)):
+            raise ValueError("Panel values must have shape (len(index), len(columns))")
+        self.values = values
+        self.index = pd.Index(index)
+        self.columns = pd.Index(columns)
+        self.path = path
+
+    @classmethod
+    def create(
+        cls,
+        path: str,
+        index: Sequence,
+        columns: Sequence,
+        dtype=DEFAULT_DTYPE,
+        fill_value: float = np.nan,
+    ) -> "Panel":
+        """Create an empty panel on disk, to be filled with :meth:`write`."""
+        index, columns = pd.Index(index), pd.Index(columns)
+        os.makedirs(path, exist_ok=True)
+        values = np.lib.format.open_memmap(
+            os.path.join(path, _VALUES),
+            mode="w+",
+            dtype=dtype,
+            shape=(len(index), len(columns)),
+            fortran_order=True,
+        )
+        values[:] = fill_value
+        _save_labels(os.path.join(path, _DATES), index)
+        _save_labels(os.path.join(path, _ASSETS), columns)
+        with open(os.path.join(path, _META), "w") as f:
+            json.dump({"index_name": index.name, "columns_name": columns.name}, f)
+        return cls(values, index, columns, path)
+
+    @classmethod
+    def open(cls, path: str, mode: str = "r") -> "Panel":
+        """Memory-map a panel written by :meth:`create` or :meth:`from_frame`."""
+        values = np.load(os.path.join(path, _VALUES), mmap_mode=mode)
+        index = pd.Index(np.load(os.path.join(path, _DATES), allow_pickle=False))
+        columns = pd.Index(np.load(os.path.join(path, _ASSETS), allow_pickle=False))
+        with open(os.path.join(path, _META)) as f:
+            meta = json.load(f)
+        index.name, columns.name = meta["index_name"], meta["columns_name"]
+        return cls(values, index, columns, path)
+
+    @classmethod
+    def from_frame(
+        cls,
+        frame: pd.DataFrame,
+        path: Optional[str] = None,
+        dtype=DEFAULT_DTYPE,
+        chunk_size: Optional[int] = None,
+    ) -> "Panel":
+        """Store ``frame`` as a panel, converting one column block at a time.
+
+        Without ``path`` the panel is kept in memory, which still halves
+        its size with the default float32 storage.
+        """
+        if path is None:
+            values = np.asfortranarray(frame.values, dtype=dtype)
+            return cls(values, frame.index, frame.columns)
+        panel = cls.create(path, frame.index, frame.columns, dtype)
+        for cols, _ in panel.column_chunks(chunk_size):
+            panel.write(cols, frame.iloc[:, cols].values)
+        panel.flush()
+        return panel
+
+    @property
+    def shape(self) -> Tuple[int, int]:
+        return self.values.shape
+
+    @property
+    def dtype(self) -> np.dtype:
+        return self.values.dtype
+
+    @property
+    def nbytes(self) -> int:
+        return self.values.nbytes
+
+    def chunk_columns(self, chunk_size: Optional[int] = None) -> int:
+        """Columns per block: ``chunk_size`` or :data:`DEFAULT_CHUNK_BYTES` of float64."""
+        if chunk_size is None:
+            chunk_size = DEFAULT_CHUNK_BYTES // (8 * max(len(self.index), 1))
+        return int(min(max(chunk_size, 1), max(len(self.columns), 1)))
+
+    def column_chunks(
+        self, chunk_size: Optional[int] = None
+    ) -> Iterator[Tuple[slice, pd.Index]]:
+        """Yield ``(slice, asset labels)`` for consecutive column blocks."""
+        step = self.chunk_columns(chunk_size)
+        for start in range(0, len(self.columns), step):
+            cols = slice(start, min(start + step, len(self.columns)))
+            yield cols, self.columns[cols]
+
+    def block(self, cols: slice = slice(None), rows: slice = slice(None)) -> np.ndarray:
+        """A float64 copy of the selected block."""
+        return np.asarray(self.values[rows, cols], dtype=float)
+
+    def write(self, cols: slice, values: np.ndarray, rows: slice = slice(None)) -> None:
+        """Write a block of values, cast to the panel's dtype."""
+        self.values[rows, cols] = values
+
+    def flush(self) -> None:
+        if isinstance(self.values, np.memmap):
+            self.values.flush()
+
+    def to_frame(
+        self,
+        columns: Optional[Sequence] = None,
+        start=None,
+        end=None,
+    ) -> pd.DataFrame:
+        """Load (a subset of) the panel into a float64 DataFrame.
+
+        ``start`` and ``end`` are inclusive date labels, as with ``.loc``.
+        """
+        rows = self.index.slice_indexer(start, end)
+        cols = (
+            np.arange(len(self.columns))
+            if columns is None
+            else self.columns.get_indexer(columns)
+        )
+        if (cols < 0).any():
+            raise KeyError("Some columns are not in the panel")
+        return pd.DataFrame(
+            np.asarray(self.values[rows][:, cols], dtype=float),
+            index=self.index[rows],
+            columns=self.columns[cols],
+        )
+
+    def __repr__(self) -> str:
+        where = f" at {self.path!r}" if self.path else ""
+        return f"Panel({self.shape[0]} dates x {self.shape[1]} assets, {self.dtype}{where})"
+
+
+class PanelFactorFit(NamedTuple):
+    """Result of :func:`panel_factor_model`."""
+
+    exposures: pd.DataFrame
+    idiosyncratic_risk: pd.Series
+    residuals: Optional[Panel]
+
+
+def _aligned_factors(panel: Panel, factor_returns: pd.DataFrame) -> np.ndarray:
+    return factor_returns.reindex(panel.index).values.astype(float)
+
+
+@instrument
+def panel_factor_model(
+    returns: Panel,
+    factor_returns: pd.DataFrame,
+    chunk_size: Optional[int] = None,
+    residuals_path: Optional[str] = None,
+) -> PanelFactorFit:
+    """Exposures and idiosyncratic risk of every asset, block by block.
+
+    Same estimator as :func:`fit_factor_model`.  The residuals are only
+    kept if ``residuals_path`` is given, in which case they are written to
+    a panel of the same dtype as ``returns``.
+
+    Parameters
+    ----------
+    returns : Panel
+        Asset returns.
+    factor_returns : pandas.DataFrame
+        Factor returns; reindexed to the dates of ``returns``.
+    chunk_size : int | None, optional
+        Assets per block, by default sized by :data:`DEFAULT_CHUNK_BYTES`.
+    residuals_path : str | None, optional
+        Directory for the residual panel, by default None.
+
+    Returns
+    -------
+    PanelFactorFit
+        Exposures (assets x factors), residual variances and the residual
+        panel (or None).
+    """
+    X = _aligned_factors(returns, factor_returns)
+    coef = np.empty((X.shape[1], len(returns.columns)))
+    idio = np.empty(len(returns.columns))
+    residuals = None
+    if residuals_path is not None:
+        residuals = Panel.create(
+            residuals_path, returns.index, returns.columns, returns.dtype
+        )
+    for cols, _ in returns.column_chunks(chunk_size):
+        coef[:, cols], resid = batched_lstsq(X, returns.block(cols))
+        idio[cols] = column_variance(resid)
+        if residuals is not None:
+            residuals.write(cols, resid)
+    if residuals is not None:
+        residuals.flush()
+    exposures = pd.DataFrame(coef.T, index=returns.columns, columns=factor_returns.columns)
+    return PanelFactorFit(exposures, pd.Series(idio, index=returns.columns), residuals)
+
+
+@instrument
+def panel_idiosyncratic_risk(
+    returns: Panel,
+    factor_returns: pd.DataFrame,
+    exposures: pd.DataFrame,
+    chunk_size: Optional[int] = None,
+) -> pd.Series:
+    """Residual variance for given exposures, as :func:`compute_idiosyncratic_risk`."""
+    X = _aligned_factors(returns, factor_returns)
+    B = exposures.reindex(returns.columns).values.astype(float)
+    idio = np.empty(len(returns.columns))
+    for cols, _ in returns.column_chunks(chunk_size):
+        idio[cols] = column_variance(returns.block(cols) - X @ B[cols].T)
+    return pd.Series(idio, index=returns.columns)
+
+
+@instrument
+def panel_select_equities(
+    returns: Panel,
+    factor_returns: pd.DataFrame,
+    expected_returns: pd.Series,
+    factor_cov: pd.DataFrame,
+    risk_aversion: float = 1.0,
+    top_n: int = 10,
+    chunk_size: Optional[int] = None,
+) -> List[str]:
+    """:func:`select_equities` on a panel."""
+    fit = panel_factor_model(returns, factor_returns, chunk_size)
+    return optimize_selection(
+        expected_returns=expected_returns,
+        exposures=fit.exposures,
+        factor_cov=factor_cov,
+        idiosyncratic_risk=fit.idiosyncratic_risk,
+        risk_aversion=risk_aversion,
+        top_n=top_n,
+    )
+
+
+def _check_window(window: int) -> None:
+    if window < 1:
+        raise ValueError("window must be a positive integer")
+
+
+@instrument
+def panel_momentum(
+    prices: Panel,
+    window: int = 60,
+    path: Optional[str] = None,
+    chunk_size: Optional[int] = None,
+) -> Panel:
+    """``prices.pct_change(window)`` for every date, written block by block.
+
+    The result has the dtype of ``prices`` and is stored at ``path``, or
+    kept in memory when no path is given.
+    """
+    _check_window(window)
+    if path is None:
+        out = Panel(
+            np.full(prices.shape, np.nan, dtype=prices.dtype, order="F"),
+            prices.index,
+            prices.columns,
+        )
+    else:
+        out = Panel.create(path, prices.index, prices.columns, prices.dtype)
+    for cols, _ in prices.column_chunks(chunk_size):
+        p = prices.block(cols)
+        change = np.full_like(p, np.nan)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            change[window:] = p[window:] / p[:-window] - 1.0
+        out.write(cols, change)
+    out.flush()
+    return out
+
+
+@instrument
+def panel_select_alternatives(
+    prices: Panel, window: int = 60, top_n: int = 5
+) -> List[str]:
+    """:func:`select_alternatives` on a panel.
+
+    Only the last price row and the row ``window`` periods earlier are
+    read.
+    """
+    _check_window(window)
+    if len(prices.index) <= window:
+        momentum = pd.Series(np.nan, index=prices.columns)
+    else:
+        last = prices.block(rows=slice(-1, None))[0]
+        first = prices.block(rows=slice(-window - 1, -window))[0]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            momentum = pd.Series(last / first - 1.0, index=prices.columns)
+    return list(momentum.nlargest(top_n).index)
+
+
+def _weight_matrix(weights, columns: pd.Index) -> np.ndarray:
+    """``(portfolios, assets)`` weights aligned to ``columns``."""
+    if isinstance(weights, pd.Series):
+        weights = weights.reindex(columns, fill_value=0.0).values
+    elif isinstance(weights, pd.DataFrame):
+        weights = weights.reindex(columns=columns, fill_value=0.0).values
+    W = np.atleast_2d(np.asarray(weights, dtype=float))
+    if W.shape[1] != len(columns):
+        raise ValueError("weights must have one entry per panel asset")
+    return W
+
+
+@instrument
+def panel_portfolio_returns(
+    weights: Union[np.ndarray, pd.Series, pd.DataFrame],
+    returns: Panel,
+    chunk_size: Optional[int] = None,
+) -> np.ndarray:
+    """Portfolio returns ``returns @ weights.T``, accumulated in float64.
+
+    ``weights`` has shape ``(assets,)`` or ``(portfolios, assets)``;
+    labelled weights are aligned to the panel's assets, missing assets
+    getting zero weight.  As in :func:`evaluate_risk_batch`, a missing
+    return makes the portfolio return ``NaN`` even where its weight is zero.
+    """
+    W = _weight_matrix(weights, returns.columns)
+    total = np.zeros((len(returns.index), W.shape[0]))
+    for cols, _ in returns.column_chunks(chunk_size):
+        total += returns.block(cols) @ W[:, cols].T
+    return total
+
+
+@instrument
+def panel_evaluate_risk(
+    weights: Union[np.ndarray, pd.Series, pd.DataFrame],
+    returns: Panel,
+    confidence_level: float = 0.95,
+    target_volatility: Optional[float] = None,
+    weight_limit: float = 0.2,
+    leverage_limit: float = 1.0,
+    covariance: Optional[CovarianceLike] = None,
+    chunk_size: Optional[int] = None,
+) -> Dict[str, object]:
+    """:func:`evaluate_risk` (one portfolio) or :func:`evaluate_risk_batch` on a panel.
+
+    A one-dimensional ``weights`` gives the scalar results of
+    :func:`evaluate_risk`; a 2-D array or DataFrame gives per-portfolio
+    arrays as :func:`evaluate_risk_batch`.
+    """
+    labels = weights.index if isinstance(weights, pd.DataFrame) else None
+    single = np.ndim(weights) == 1
+    W = _weight_matrix(weights, returns.columns)
+    result = _risk_from_portfolio_returns(
+        W,
+        panel_portfolio_returns(W, returns, chunk_size),
+        labels,
+        confidence_level,
+        target_volatility,
+        weight_limit,
+        leverage_limit,
+        covariance,
+    )
+    if not single:
+        return result
+    return {
+        "weights": result["weights"][0],
+        "var": float(result["var"][0]),
+        "cvar": float(result["cvar"][0]),
+        "volatility": float(result["volatility"][0]),
+        "limit_breaches": {
+            name: bool(flags[0]) for name, flags in result["limit_breaches"].items()
+        },
+    }
+
+
+__all__ = [
+    "DEFAULT_DTYPE",
+    "DEFAULT_CHUNK_BYTES",
+    "Panel",
+    "PanelFactorFit",
+    "panel_factor_model",
+    "panel_idiosyncratic_risk",
+    "panel_select_equities",
+    "panel_momentum",
+    "panel_select_alternatives",
+    "panel_portfolio_returns",
+    "panel_evaluate_risk",
+]
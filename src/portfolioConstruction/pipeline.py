@@ -0,0 +1,293 @@
+"""Multi-asset-class pipeline: sleeve selection, allocation and risk.
+
+:class:`MultiAssetPipeline` ties the package together.  The equity,
+fixed income and alternatives selectors are independent, so they run
+concurrently on a thread pool (the heavy lifting is in NumPy, which
+releases the GIL).  The union of the selected assets is then allocated
+with :func:`constrained_mean_variance_weights` on returns predicted by
+:func:`predict_returns`, and the portfolio is checked with
+:func:`evaluate_risk`.
+
+Every step's result is cached on the pipeline under a fingerprint of its
+inputs (a hash of the data and the parameters it depends on).  Calling
+:meth:`MultiAssetPipeline.run` again after only one sleeve's data changed
+recomputes that sleeve and the allocation and risk steps that depend on
+it; the other sleeves are served from the cache.
+"""
+
+from __future__ import annotations
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .alternatives_selection import select_alternatives
+from .asset_allocation_ml import constrained_mean_variance_weights, predict_returns
+from .barra_equity_selector import select_equities
+from .fixed_income_selection import select_fixed_income
+from .instrumentation import instrument, stage
+from .memoize import fingerprint
+from .risk_management import evaluate_risk
+
+SLEEVES = ("equities", "fixed_income", "alternatives")
+
+
+class PipelineResult(NamedTuple):
+    """Output of :meth:`MultiAssetPipeline.run`."""
+
+    selections: Dict[str, List[str]]
+    expected_returns: pd.Series
+    covariance: np.ndarray
+    weights: pd.Series
+    risk: Dict[str, object]
+    recomputed: List[str]
+
+
+def _select_equity_sleeve(
+    returns: pd.DataFrame,
+    factor_returns: pd.DataFrame,
+    risk_aversion: float,
+    top_n: int,
+) -> List[str]:
+    mu, _ = predict_returns(returns, factor_returns)
+    return select_equities(
+        returns,
+        factor_returns,
+        mu,
+        factor_returns.cov(),
+        risk_aversion=risk_aversion,
+        top_n=top_n,
+    )
+
+
+class MultiAssetPipeline:
+    """Select, allocate and risk-check a multi-asset-class portfolio.
+
+    Parameters
+    ----------
+    equity_top_n, fixed_income_top_n, alternatives_top_n : int, optional
+        Number of assets selected in each sleeve, by default 10, 10 and 5.
+    alternatives_window : int, optional
+        Momentum look-back for the alternatives sleeve, by default 60.
+    risk_aversion : float, optional
+        Risk aversion used for equity selection and allocation, by
+        default 1.0.
+    weight_limit : float, optional
+        Maximum weight per asset (raised to ``1 / n`` when fewer assets are
+        selected), by default 0.2.
+    leverage_limit : float, optional
+        Maximum gross exposure, by default 1.0.
+    confidence_level : float, optional
+        VaR/CVaR confidence level, by default 0.95.
+    target_volatility : float | None, optional
+        Scale the weights to this volatility in the risk step, by default
+        None.
+    max_workers : int, optional
+        Threads used for the sleeve selectors, by default 3.
+    """
+
+    def __init__(
+        self,
+        equity_top_n: int = 10,
+        fixed_income_top_n: int = 10,
+        alternatives_top_n: int = 5,
+        alternatives_window: int = 60,
+        risk_aversion: float = 1.0,
+        weight_limit: float = 0.2,
+        leverage_limit: float = 1.0,
+        confidence_level: float = 0.95,
+        target_volatility: Optional[float] = None,
+        max_workers: int = 3,
+    ) -> None:
+        self.equity_top_n = equity_top_n
+        self.fixed_income_top_n = fixed_income_top_n
+        self.alternatives_top_n = alternatives_top_n
+        self.alternatives_window = alternatives_window
+        self.risk_aversion = risk_aversion
+        self.weight_limit = weight_limit
+        self.leverage_limit = leverage_limit
+        self.confidence_level = confidence_level
+        self.target_volatility = target_volatility
+        self.max_workers = max_workers
+        self._cache: Dict[str, Tuple[str, object]] = {}
+
+    def clear_cache(self) -> None:
+        self._cache.clear()
+
+    def _cached(self, step: str, key: str) -> Tuple[bool, object]:
+        entry = self._cache.get(step)
+        if entry is not None and entry[0] == key:
+            return True, entry[1]
+        return False, None
+
+    def _sleeve_tasks(
+        self,
+        equity_returns: pd.DataFrame,
+        factor_returns: pd.DataFrame,
+        yields: pd.DataFrame,
+        credit_spreads: pd.DataFrame,
+        alternative_prices: pd.DataFrame,
+    ) -> Dict[str, Tuple[str, Callable[[], List[str]]]]:
+        return {
+            "equities": (
+                fingerprint(
+                    equity_returns, factor_returns, self.risk_aversion, self.equity_top_n
+                ),
+                lambda: _select_equity_sleeve(
+                    equity_returns, factor_returns, self.risk_aversion, self.equity_top_n
+                ),
+            ),
+            "fixed_income": (
+                fingerprint(yields, credit_spreads, self.fixed_income_top_n),
+                lambda: select_fixed_income(
+                    yields, credit_spreads, top_n=self.fixed_income_top_n
+                ),
+            ),
+            "alternatives": (
+                fingerprint(
+                    alternative_prices, self.alternatives_window, self.alternatives_top_n
+                ),
+                lambda: select_alternatives(
+                    alternative_prices,
+                    window=self.alternatives_window,
+                    top_n=self.alternatives_top_n,
+                ),
+            ),
+        }
+
+    @instrument(name="pipeline.MultiAssetPipeline.run")
+    def run(
+        self,
+        equity_returns: pd.DataFrame,
+        factor_returns: pd.DataFrame,
+        yields: pd.DataFrame,
+        credit_spreads: pd.DataFrame,
+        alternative_prices: pd.DataFrame,
+        bond_returns: pd.DataFrame,
+    ) -> PipelineResult:
+        """Run (or refresh) the pipeline.
+
+        Parameters
+        ----------
+        equity_returns : pandas.DataFrame
+            Equity returns, dates in rows and assets in columns.
+        factor_returns : pandas.DataFrame
+            Factor returns sharing the dates of ``equity_returns``; used
+            for equity selection and as the return-prediction features in
+            the allocation step.
+        yields, credit_spreads : pandas.DataFrame
+            Bond yields and credit spreads for the fixed income sleeve.
+        alternative_prices : pandas.DataFrame
+            Prices of alternative assets.
+        bond_returns : pandas.DataFrame
+            Returns of the bonds in ``yields``, used to allocate to and
+            risk-check the fixed income sleeve.
+
+        Returns
+        -------
+        PipelineResult
+            Selections per sleeve, predicted returns and covariance of the
+            selected assets, weights, the :func:`evaluate_risk` output and
+            the steps recomputed by this call.
+        """
+        recomputed: List[str] = []
+        tasks = self._sleeve_tasks(
+            equity_returns, factor_returns, yields, credit_spreads, alternative_prices
+        )
+        selections: Dict[str, List[str]] = {}
+        pending = {}
+        for sleeve, (key, _) in tasks.items():
+            hit, value = self._cached(sleeve, key)
+            if hit:
+                selections[sleeve] = value
+            else:
+                pending[sleeve] = key
+
+        if pending:
+            workers = max(1, min(self.max_workers, len(pending)))
+            with stage("pipeline.select_sleeves"), ThreadPoolExecutor(
+                max_workers=workers
+            ) as pool:
+                futures = {s: pool.submit(tasks[s][1]) for s in pending}
+                for sleeve, future in futures.items():
+                    selections[sleeve] = list(future.result())
+                    self._cache[sleeve] = (pending[sleeve], selections[sleeve])
+                    recomputed.append(sleeve)
+        selections = {sleeve: selections[sleeve] for sleeve in SLEEVES}
+
+        asset_returns = self._asset_returns(
+            selections, equity_returns, bond_returns, alternative_prices
+        )
+        features = factor_returns.reindex(asset_returns.index)
+        allocation_key = fingerprint(
+            asset_returns,
+            features,
+            self.risk_aversion,
+            self.weight_limit,
+            self.leverage_limit,
+        )
+        hit, allocation = self._cached("allocation", allocation_key)
+        if not hit:
+            mu, cov = predict_returns(asset_returns, features)
+            weight_limit = max(self.weight_limit, 1.0 / len(mu))
+            weights = constrained_mean_variance_weights(
+                mu,
+                cov,
+                risk_aversion=self.risk_aversion,
+                weight_limit=weight_limit,
+                leverage_limit=max(self.leverage_limit, 1.0),
+            )
+            allocation = (mu, cov, weights, weight_limit)
+            self._cache["allocation"] = (allocation_key, allocation)
+            recomputed.append("allocation")
+        mu, cov, weights, weight_limit = allocation
+
+        risk_key = fingerprint(
+            allocation_key, self.confidence_level, self.target_volatility
+        )
+        hit, risk = self._cached("risk", risk_key)
+        if not hit:
+            risk = evaluate_risk(
+                weights.values,
+                asset_returns,
+                confidence_level=self.confidence_level,
+                target_volatility=self.target_volatility,
+                weight_limit=weight_limit,
+                leverage_limit=max(self.leverage_limit, 1.0),
+            )
+            self._cache["risk"] = (risk_key, risk)
+            recomputed.append("risk")
+
+        return PipelineResult(selections, mu, cov, weights, risk, recomputed)
+
+    @staticmethod
+    def _asset_returns(
+        selections: Dict[str, List[str]],
+        equity_returns: pd.DataFrame,
+        bond_returns: pd.DataFrame,
+        alternative_prices: pd.DataFrame,
+    ) -> pd.DataFrame:
+        """Returns of every selected asset on the dates they all share."""
+        alternative_returns = alternative_prices[selections["alternatives"]].pct_change()
+        panel = pd.concat(
+            [
+                equity_returns[selections["equities"]],
+                bond_returns[selections["fixed_income"]],
+                alternative_returns,
+            ],
+            axis=1,
+            join="inner",
+        )
+        panel = panel.loc[:, ~panel.columns.duplicated()].dropna()
+        if panel.empty:
+            raise ValueError("Selected assets have no dates with complete returns")
+        return panel
+
+
+__all__ = [
+    "SLEEVES",
+    "PipelineResult",
+    "MultiAssetPipeline",
+]
@@ -1,6 +1,11 @@
 import numpy as np
 import pandas as pd
-from typing import Optional, Dict
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional, Dict, Tuple, Union
+
+from .factor_covariance import CovarianceLike, FactorCovariance, portfolio_variance
+from .instrumentation import instrument
 
 
 def calculate_var(portfolio_returns: pd.Series, confidence_level: float = 0.95) -> float:
@@ -49,8 +54,317 @@ def calculate_cvar(portfolio_returns: pd.Series, confidence_level: float = 0.95)
     return -tail_losses.mean() if not tail_losses.empty else -var_threshold
 
 
+def _tail_risk(
+    portfolio_returns: np.ndarray, confidence_level: float = 0.95
+) -> Tuple[np.ndarray, np.ndarray]:
+    """VaR and CVaR for each column of a ``(T, M)`` array of returns.
+
+    The percentile is located with :func:`numpy.partition` (linear
+    interpolation, as in :func:`numpy.percentile`) and reused for the CVaR
+    tail, so each column costs ``O(T)`` rather than a full sort.
+    """
+    values = np.asarray(portfolio_returns, dtype=float)
+    n_obs, n_cols = values.shape
+    if n_obs == 0:
+        return np.zeros(n_cols), np.zeros(n_cols)
+
+    position = (1 - confidence_level) * (n_obs - 1)
+    lower = int(np.floor(position))
+    upper = min(lower + 1, n_obs - 1)
+    ordered = np.partition(values, [lower, upper], axis=0)
+    threshold = ordered[lower] + (position - lower) * (ordered[upper] - ordered[lower])
+
+    in_tail = values <= threshold
+    count = in_tail.sum(axis=0)
+    tail_sum = np.where(in_tail, values, 0.0).sum(axis=0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        cvar = np.where(count > 0, -tail_sum / count, -threshold)
+
+    missing = np.isnan(values).any(axis=0)
+    threshold[missing] = np.nan
+    cvar[missing] = np.nan
+    return -threshold, cvar
+
+
+class RollingTailRisk:
+    """Incremental VaR/CVaR over a sliding (or expanding) window of returns.
+
+    The current window is kept as a sorted array, so each new return is
+    inserted (and the oldest one evicted) with a binary search and a
+    single block move, and the VaR order statistic is read directly.
+    Feed returns one at a time with :meth:`update` for streaming use, or
+    use :func:`rolling_var_cvar` for a whole series.
+
+    Parameters
+    ----------
+    window : int | None
+        Number of most recent returns to keep.  ``None`` keeps every
+        return seen so far (expanding window).
+    confidence_level : float, optional
+        Confidence level for VaR/CVaR, by default 0.95.
+    """
+
+    def __init__(self, window: Optional[int], confidence_level: float = 0.95) -> None:
+        if window is not None and window < 1:
+            raise ValueError("window must be a positive integer")
+        self.window = window
+        self.confidence_level = confidence_level
+        self._sorted = np.empty(window if window is not None else 256)
+        # Arrival order, only needed to evict the oldest return of a window.
+        self._arrivals = np.empty(window) if window is not None else None
+        self._head = 0
+        self.count = 0
+
+    def _grow(self) -> None:
+        self._sorted = np.resize(self._sorted, 2 * self._sorted.size)
+
+    def update(self, value: float) -> Tuple[float, float]:
+        """Add one return and return the current ``(var, cvar)``.
+
+        Missing values are ignored and leave the window unchanged.
+        """
+        value = float(value)
+        if np.isnan(value):
+            return self.var(), self.cvar()
+
+        n = self.count
+        buf = self._sorted
+        if self.window is not None and n == self.window:
+            oldest = self._arrivals[self._head]
+            self._arrivals[self._head] = value
+            self._head = (self._head + 1) % self.window
+            i = int(np.searchsorted(buf[:n], oldest))
+            buf[i : n - 1] = buf[i + 1 : n]
+            n -= 1
+        else:
+            if n == buf.size:
+                self._grow()
+                buf = self._sorted
+            if self._arrivals is not None:
+                self._arrivals[n] = value
+
+        j = int(np.searchsorted(buf[:n], value))
+        buf[j + 1 : n + 1] = buf[j:n]
+        buf[j] = value
+        self.count = n + 1
+        return self.var(), self.cvar()
+
+    def _threshold(self) -> float:
+        n = self.count
+        position = (1 - self.confidence_level) * (n - 1)
+        lower = int(np.floor(position))
+        upper = min(lower + 1, n - 1)
+        ordered = self._sorted
+        return ordered[lower] + (position - lower) * (ordered[upper] - ordered[lower])
+
+    def var(self) -> float:
+        """Historical VaR of the current window as a positive loss."""
+        if self.count == 0:
+            return 0.0
+        return -self._threshold()
+
+    def cvar(self) -> float:
+        """Historical CVaR of the current window as a positive loss."""
+        if self.count == 0:
+            return 0.0
+        threshold = self._threshold()
+        tail = int(np.searchsorted(self._sorted[: self.count], threshold, side="right"))
+        return -self._sorted[:tail].mean() if tail else -threshold
+
+
+@instrument
+def rolling_var_cvar(
+    portfolio_returns: pd.Series,
+    window: Optional[int],
+    confidence_level: float = 0.95,
+    min_periods: Optional[int] = None,
+) -> pd.DataFrame:
+    """Rolling historical VaR and CVaR time series.
+
+    Each row matches :func:`calculate_var` and :func:`calculate_cvar` on
+    the trailing ``window`` returns, but the window is maintained
+    incrementally by :class:`RollingTailRisk`, so a series of length
+    ``T`` costs ``O(T·W)`` block moves instead of ``T`` full sorts.  As
+    with those functions, rows whose window contains a missing return are
+    ``NaN``.
+
+    Parameters
+    ----------
+    portfolio_returns : pd.Series
+        Series of portfolio returns.
+    window : int | None
+        Rolling window length; ``None`` for an expanding window.
+    confidence_level : float, optional
+        Confidence level for VaR/CVaR, by default 0.95.
+    min_periods : int | None, optional
+        Minimum number of returns before values are reported, by default
+        the full ``window`` (or 1 for an expanding window).
+
+    Returns
+    -------
+    pd.DataFrame
+        Columns ``var`` and ``cvar`` indexed like ``portfolio_returns``.
+    """
+    if min_periods is None:
+        min_periods = window if window is not None else 1
+    engine = RollingTailRisk(window, confidence_level)
+    values = np.asarray(portfolio_returns, dtype=float)
+    result = np.full((len(values), 2), np.nan)
+    for t, value in enumerate(values):
+        var_value, cvar_value = engine.update(value)
+        if engine.count >= min_periods:
+            result[t] = var_value, cvar_value
+
+    # The engine skips missing returns; mask the windows that held one.
+    missing = np.cumsum(np.isnan(values))
+    if window is not None:
+        missing[window:] = missing[window:] - missing[:-window]
+    result[missing > 0] = np.nan
+    return pd.DataFrame(result, index=portfolio_returns.index, columns=["var", "cvar"])
+
+
+def _factor_loading_root(factor_cov: np.ndarray) -> np.ndarray:
+    """Matrix ``L`` with ``L Lᵀ = factor_cov``; tolerates singular matrices."""
+    try:
+        return np.linalg.cholesky(factor_cov)
+    except np.linalg.LinAlgError:
+        eigval, eigvec = np.linalg.eigh(factor_cov)
+        return eigvec * np.sqrt(np.clip(eigval, 0.0, None))
+
+
+def _simulate_chunk(
+    seed: np.random.SeedSequence,
+    n_paths: int,
+    loading: np.ndarray,
+    mean: float,
+    idio_vol: float,
+    n_keep: int,
+) -> Tuple[np.ndarray, float, float]:
+    """Simulate one chunk of portfolio returns and reduce it.
+
+    Returns the ``n_keep`` smallest simulated returns together with the
+    sum and sum of squares of the chunk.
+    """
+    rng = np.random.default_rng(seed)
+    shocks = rng.standard_normal((n_paths, loading.shape[0]))
+    simulated = mean + shocks @ loading + idio_vol * rng.standard_normal(n_paths)
+    total = float(simulated.sum())
+    total_sq = float(simulated @ simulated)
+    if n_keep < n_paths:
+        simulated = np.partition(simulated, n_keep - 1)[:n_keep]
+    return simulated, total, total_sq
+
+
+@instrument
+def simulate_factor_var(
+    weights: np.ndarray,
+    model: FactorCovariance,
+    confidence_level: float = 0.95,
+    n_paths: int = 1_000_000,
+    chunk_size: int = 100_000,
+    n_workers: int = 1,
+    seed: Optional[int] = None,
+    expected_returns: Optional[np.ndarray] = None,
+) -> Dict[str, float]:
+    """Monte Carlo VaR/CVaR from the factor risk model.
+
+    Each scenario draws factor shocks from ``model.F`` and idiosyncratic
+    noise from ``model.D``, so assets with short histories are covered
+    by their factor exposures.  Because the shocks are Gaussian, the
+    idiosyncratic contribution of the portfolio is drawn directly with
+    variance ``Σ w_i² D_i`` rather than one draw per asset.
+
+    Scenarios are generated in chunks of ``chunk_size`` paths, optionally
+    on a process pool.  Every chunk gets its own child of
+    ``numpy.random.SeedSequence(seed)``, so results do not depend on the
+    number of workers.  Only the lower tail needed for VaR/CVaR is kept
+    from each chunk, so memory is bounded by the tail size plus the
+    chunks in flight.
+
+    Parameters
+    ----------
+    weights : np.ndarray
+        Portfolio weights aligned with the model's assets.
+    model : FactorCovariance
+        Factor risk model with exposures, factor covariance and
+        idiosyncratic variances.
+    confidence_level : float, optional
+        Confidence level for VaR/CVaR, by default 0.95.
+    n_paths : int, optional
+        Number of simulated scenarios, by default 1,000,000.
+    chunk_size : int, optional
+        Scenarios generated per task, by default 100,000.
+    n_workers : int, optional
+        Number of worker processes; 1 runs in the current process, by
+        default 1.
+    seed : int | None, optional
+        Seed for reproducible scenarios, by default None.
+    expected_returns : np.ndarray | None, optional
+        Expected asset returns added to every scenario, by default zero.
+
+    Returns
+    -------
+    dict
+        VaR, CVaR and volatility of the simulated portfolio returns and
+        the number of paths.
+    """
+    weights = np.asarray(weights, dtype=float)
+    factor_exposure = model.B.T @ weights
+    loading = _factor_loading_root(model.F).T @ factor_exposure
+    idio_vol = float(np.sqrt((weights * weights) @ model.D))
+    mean = float(weights @ expected_returns) if expected_returns is not None else 0.0
+
+    position = (1 - confidence_level) * (n_paths - 1)
+    n_keep = min(int(np.floor(position)) + 2, n_paths)
+    sizes = [min(chunk_size, n_paths - start) for start in range(0, n_paths, chunk_size)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    args = [(sq, size, loading, mean, idio_vol, n_keep) for sq, size in zip(seeds, sizes)]
+
+    tail = np.empty(0)
+    total = total_sq = 0.0
+
+    def merge(result: Tuple[np.ndarray, float, float]) -> None:
+        nonlocal tail, total, total_sq
+        chunk_tail, chunk_sum, chunk_sq = result
+        tail = np.concatenate([tail, chunk_tail])
+        if tail.size > n_keep:
+            tail = np.partition(tail, n_keep - 1)[:n_keep]
+        total += chunk_sum
+        total_sq += chunk_sq
+
+    if n_workers <= 1:
+        for task in args:
+            merge(_simulate_chunk(*task))
+    else:
+        with ProcessPoolExecutor(max_workers=n_workers) as pool:
+            pending = deque()
+            for task in args:
+                pending.append(pool.submit(_simulate_chunk, *task))
+                if len(pending) >= 2 * n_workers:
+                    merge(pending.popleft().result())
+            while pending:
+                merge(pending.popleft().result())
+
+    tail.sort()
+    lower = int(np.floor(position))
+    upper = min(lower + 1, tail.size - 1)
+    threshold = tail[lower] + (position - lower) * (tail[upper] - tail[lower])
+    in_tail = tail[tail <= threshold]
+    variance = (total_sq - total * total / n_paths) / max(n_paths - 1, 1)
+    return {
+        "var": float(-threshold),
+        "cvar": float(-in_tail.mean()) if in_tail.size else float(-threshold),
+        "volatility": float(np.sqrt(max(variance, 0.0))),
+        "n_paths": n_paths,
+    }
+
+
+@instrument
 def apply_volatility_targeting(
-    weights: np.ndarray, returns: pd.DataFrame, target_volatility: float
+    weights: np.ndarray,
+    returns: Optional[pd.DataFrame],
+    target_volatility: float,
+    covariance: Optional[CovarianceLike] = None,
 ) -> np.ndarray:
     """Scale weights to target a desired portfolio volatility.
 
@@ -62,6 +376,9 @@ def apply_volatility_targeting(
         Historical asset returns.
     target_volatility : float
         Target volatility for the portfolio.
+    covariance : array-like or FactorCovariance, optional
+        Asset covariance. If provided, the current volatility is computed
+        as ``sqrt(wᵀ Σ w)`` instead of from ``returns``, by default None.
 
     Returns
     -------
@@ -69,9 +386,11 @@ def apply_volatility_targeting(
         Scaled weights targeting the desired volatility.
     """
     weights = np.asarray(weights, dtype=float)
-    returns = pd.DataFrame(returns)
-    portfolio_returns = returns.dot(weights)
-    current_vol = portfolio_returns.std(ddof=1)
+    if covariance is not None:
+        current_vol = np.sqrt(portfolio_variance(weights, covariance))
+    else:
+        portfolio_returns = pd.DataFrame(returns).dot(weights)
+        current_vol = portfolio_returns.std(ddof=1)
 
     if current_vol <= 0:
         return weights
@@ -107,6 +426,7 @@ def check_limits(
     return breaches
 
 
+@instrument
 def evaluate_risk(
     weights: np.ndarray,
     returns: pd.DataFrame,
@@ -114,6 +434,7 @@ def evaluate_risk(
     target_volatility: Optional[float] = None,
     weight_limit: float = 0.2,
     leverage_limit: float = 1.0,
+    covariance: Optional[CovarianceLike] = None,
 ) -> Dict[str, object]:
     """Evaluate risk metrics for a portfolio.
 
@@ -137,6 +458,9 @@ def evaluate_risk(
         Maximum absolute position size per asset, by default 0.2.
     leverage_limit : float, optional
         Maximum total absolute exposure, by default 1.0.
+    covariance : array-like or FactorCovariance, optional
+        Asset covariance used for volatility targeting instead of the
+        historical ``returns``, by default None.
 
     Returns
     -------
@@ -145,23 +469,115 @@ def evaluate_risk(
         breaches.
     """
     weights = np.asarray(weights, dtype=float)
-    returns = pd.DataFrame(returns)
+    batch = evaluate_risk_batch(
+        weights[None, :],
+        returns,
+        confidence_level=confidence_level,
+        target_volatility=target_volatility,
+        weight_limit=weight_limit,
+        leverage_limit=leverage_limit,
+        covariance=covariance,
+    )
+    return {
+        "weights": batch["weights"][0],
+        "var": float(batch["var"][0]),
+        "cvar": float(batch["cvar"][0]),
+        "volatility": float(batch["volatility"][0]),
+        "limit_breaches": {
+            name: bool(flags[0]) for name, flags in batch["limit_breaches"].items()
+        },
+    }
 
-    # Apply volatility targeting if requested
-    scaled_weights = (
-        apply_volatility_targeting(weights, returns, target_volatility)
-        if target_volatility is not None
-        else weights
+
+@instrument
+def evaluate_risk_batch(
+    weights: Union[np.ndarray, pd.DataFrame],
+    returns: pd.DataFrame,
+    confidence_level: float = 0.95,
+    target_volatility: Optional[float] = None,
+    weight_limit: float = 0.2,
+    leverage_limit: float = 1.0,
+    covariance: Optional[CovarianceLike] = None,
+) -> Dict[str, object]:
+    """Evaluate risk metrics for many portfolios at once.
+
+    All portfolio return series come from a single matrix product.
+    Volatility targeting rescales those series instead of recomputing
+    them, and VaR and CVaR share one partition-based tail computation per
+    portfolio.
+
+    Parameters
+    ----------
+    weights : np.ndarray or pd.DataFrame
+        Weights of shape ``(portfolios, assets)``.  If a DataFrame is
+        given, its index labels the portfolios in the results.
+    returns : pd.DataFrame
+        Historical asset returns used to evaluate risk.
+    confidence_level, target_volatility, weight_limit, leverage_limit, covariance
+        As for :func:`evaluate_risk`, applied to every portfolio.
+
+    Returns
+    -------
+    dict
+        Same keys as :func:`evaluate_risk` with one entry per portfolio:
+        ``weights`` is a ``(portfolios, assets)`` array, ``var``, ``cvar``
+        and ``volatility`` are arrays (Series when ``weights`` is a
+        DataFrame) and each limit breach is a boolean array.
+    """
+    labels = weights.index if isinstance(weights, pd.DataFrame) else None
+    weights = np.atleast_2d(np.asarray(weights, dtype=float))
+    returns = np.asarray(pd.DataFrame(returns).values, dtype=float)
+    return _risk_from_portfolio_returns(
+        weights,
+        returns @ weights.T,
+        labels,
+        confidence_level,
+        target_volatility,
+        weight_limit,
+        leverage_limit,
+        covariance,
     )
 
-    portfolio_returns = returns.dot(scaled_weights)
-    var_value = calculate_var(portfolio_returns, confidence_level)
-    cvar_value = calculate_cvar(portfolio_returns, confidence_level)
-    volatility = portfolio_returns.std(ddof=1)
-    breaches = check_limits(scaled_weights, weight_limit, leverage_limit)
+
+def _risk_from_portfolio_returns(
+    weights: np.ndarray,
+    portfolio_returns: np.ndarray,
+    labels: Optional[pd.Index],
+    confidence_level: float,
+    target_volatility: Optional[float],
+    weight_limit: float,
+    leverage_limit: float,
+    covariance: Optional[CovarianceLike],
+) -> Dict[str, object]:
+    """Risk metrics of :func:`evaluate_risk_batch` from ``(T, M)`` portfolio returns."""
+    volatility = np.nanstd(portfolio_returns, axis=0, ddof=1)
+
+    if target_volatility is not None:
+        current_vol = (
+            np.sqrt(portfolio_variance(weights, covariance))
+            if covariance is not None
+            else volatility
+        )
+        scale = np.ones_like(current_vol)
+        positive = current_vol > 0
+        scale[positive] = target_volatility / current_vol[positive]
+        weights = weights * scale[:, None]
+        portfolio_returns = portfolio_returns * scale
+        volatility = volatility * scale
+
+    var_value, cvar_value = _tail_risk(portfolio_returns, confidence_level)
+    gross = np.abs(weights)
+    breaches = {
+        "weight_limit": np.any(gross > weight_limit, axis=1),
+        "leverage_limit": gross.sum(axis=1) > leverage_limit,
+    }
+    if labels is not None:
+        var_value = pd.Series(var_value, index=labels)
+        cvar_value = pd.Series(cvar_value, index=labels)
+        volatility = pd.Series(volatility, index=labels)
 
     return {
-        "weights": scaled_weights,
+        "weights": weights,
         "var": var_value,
         "cvar": cvar_value,
         "volatility": volatility,
@@ -172,7 +588,11 @@ def evaluate_risk(
 __all__ = [
     "calculate_var",
     "calculate_cvar",
+    "RollingTailRisk",
+    "rolling_var_cvar",
+    "simulate_factor_var",
     "apply_volatility_targeting",
     "check_limits",
     "evaluate_risk",
+    "evaluate_risk_batch",
 ]
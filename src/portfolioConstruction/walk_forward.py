@@ -0,0 +1,245 @@
+"""Walk-forward evaluation of the selection, allocation and risk pipeline.
+
+Each fold trains on a trailing window of returns, runs
+:func:`select_equities`, allocates across the selected assets with
+:func:`constrained_mean_variance_weights`, scales the result to a target
+volatility estimated on the training window and finally calls
+:func:`evaluate_risk` on the following out-of-sample period.  Folds and
+parameter sets are independent, so they can be spread over a process
+pool.  The return and factor panels are placed in shared memory once and
+workers attach to them, so only the small fold descriptions are pickled
+per task.
+"""
+
+from __future__ import annotations
+
+import itertools
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import shared_memory
+from typing import Dict, Iterable, List, Mapping, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from .asset_allocation_ml import constrained_mean_variance_weights, predict_returns
+from .barra_equity_selector import select_equities
+from .instrumentation import instrument
+from .risk_management import apply_volatility_targeting, evaluate_risk
+
+DEFAULT_PARAMS = {
+    "top_n": 10,
+    "risk_aversion": 1.0,
+    "window": 120,
+    "target_volatility": None,
+    "weight_limit": 0.2,
+}
+
+# Panels seen by worker processes, set once by ``_init_worker``.
+_PANELS: Dict[str, pd.DataFrame] = {}
+_SEGMENTS: List[shared_memory.SharedMemory] = []
+
+
+def parameter_grid(grid: Mapping[str, Sequence]) -> List[Dict[str, object]]:
+    """Expand ``{"top_n": [5, 10], ...}`` into a list of parameter sets."""
+    names = list(grid)
+    return [dict(zip(names, values)) for values in itertools.product(*grid.values())]
+
+
+def walk_forward_splits(
+    n_dates: int, min_train: int, test_size: int, step: Optional[int] = None
+) -> List[Tuple[int, int]]:
+    """Test periods ``(start, end)`` as row positions.
+
+    The first test period starts after ``min_train`` rows and subsequent
+    periods start every ``step`` rows (``test_size`` by default).
+    """
+    step = step or test_size
+    return [
+        (start, min(start + test_size, n_dates))
+        for start in range(min_train, n_dates, step)
+    ]
+
+
+@instrument
+def evaluate_fold(
+    returns: pd.DataFrame,
+    factor_returns: pd.DataFrame,
+    test_start: int,
+    test_end: int,
+    params: Mapping[str, object],
+) -> Dict[str, object]:
+    """Run the pipeline for one fold and parameter set.
+
+    Returns
+    -------
+    dict
+        One row of the results table: the fold dates, the parameters and
+        the out-of-sample risk and return of the resulting portfolio.
+    """
+    params = {**DEFAULT_PARAMS, **params}
+    window = int(params["window"])
+    train = slice(max(test_start - window, 0), test_start)
+    train_returns = returns.iloc[train]
+    train_factors = factor_returns.iloc[train]
+    test_returns = returns.iloc[test_start:test_end]
+
+    mu, cov = predict_returns(train_returns, train_factors)
+    selected = select_equities(
+        train_returns,
+        train_factors,
+        mu,
+        train_factors.cov(),
+        risk_aversion=float(params["risk_aversion"]),
+        top_n=int(params["top_n"]),
+    )
+    positions = returns.columns.get_indexer(selected)
+    weight_limit = max(float(params["weight_limit"]), 1.0 / len(selected))
+    weights = constrained_mean_variance_weights(
+        mu.iloc[positions],
+        cov[np.ix_(positions, positions)],
+        risk_aversion=float(params["risk_aversion"]),
+        weight_limit=weight_limit,
+    ).values
+    if params["target_volatility"] is not None:
+        weights = apply_volatility_targeting(
+            weights, train_returns[selected], float(params["target_volatility"])
+        )
+
+    risk = evaluate_risk(
+        weights,
+        test_returns[selected],
+        weight_limit=weight_limit,
+        leverage_limit=max(1.0, np.abs(weights).sum()),
+    )
+    realised = test_returns[selected].values @ weights
+    return {
+        "train_start": returns.index[train.start],
+        "test_start": returns.index[test_start],
+        "test_end": returns.index[test_end - 1],
+        **{name: params[name] for name in sorted(params)},
+        "selected": ",".join(map(str, selected)),
+        "gross_exposure": float(np.abs(weights).sum()),
+        "var": risk["var"],
+        "cvar": risk["cvar"],
+        "volatility": risk["volatility"],
+        "cumulative_return": float(np.prod(1.0 + realised) - 1.0),
+        "mean_return": float(realised.mean()),
+        "weight_limit_breach": risk["limit_breaches"]["weight_limit"],
+    }
+
+
+def _share(frame: pd.DataFrame) -> Tuple[shared_memory.SharedMemory, tuple]:
+    """Copy ``frame`` into a new shared memory block."""
+    values = np.ascontiguousarray(frame.values, dtype=float)
+    segment = shared_memory.SharedMemory(create=True, size=max(values.nbytes, 1))
+    np.ndarray(values.shape, dtype=float, buffer=segment.buf)[:] = values
+    return segment, (segment.name, values.shape, frame.index, frame.columns)
+
+
+def _attach(name: str) -> shared_memory.SharedMemory:
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name=name, track=False)
+    from multiprocessing import resource_tracker
+
+    # Only the parent owns the block, so keep workers from registering it
+    # with the resource tracker (which would unlink it when they exit).
+    register = resource_tracker.register
+    resource_tracker.register = lambda name, rtype: None
+    try:
+        return shared_memory.SharedMemory(name=name)
+    finally:
+        resource_tracker.register = register
+
+
+def _init_worker(specs: Mapping[str, tuple]) -> None:
+    for key, (name, shape, index, columns) in specs.items():
+        segment = _attach(name)
+        _SEGMENTS.append(segment)
+        values = np.ndarray(shape, dtype=float, buffer=segment.buf)
+        _PANELS[key] = pd.DataFrame(values, index=index, columns=columns, copy=False)
+
+
+def _run_shared(test_start: int, test_end: int, params: Mapping[str, object]):
+    return evaluate_fold(
+        _PANELS["returns"], _PANELS["factors"], test_start, test_end, params
+    )
+
+
+@instrument
+def walk_forward(
+    returns: pd.DataFrame,
+    factor_returns: pd.DataFrame,
+    param_grid: Union[Mapping[str, Sequence], Iterable[Mapping[str, object]]],
+    test_size: int,
+    step: Optional[int] = None,
+    n_workers: int = 1,
+) -> pd.DataFrame:
+    """Walk-forward evaluation over rebalance dates and parameter sets.
+
+    Parameters
+    ----------
+    returns : pandas.DataFrame
+        Asset returns with dates in rows and assets in columns.
+    factor_returns : pandas.DataFrame
+        Factor returns sharing the index of ``returns``.
+    param_grid : mapping or iterable of mappings
+        Either ``{name: values}`` to take the Cartesian product of, or an
+        explicit list of parameter sets.  Recognised names are ``top_n``,
+        ``risk_aversion``, ``window``, ``target_volatility`` and
+        ``weight_limit``; missing ones use :data:`DEFAULT_PARAMS`.
+    test_size : int
+        Number of out-of-sample rows per fold.
+    step : int | None, optional
+        Rows between consecutive fold starts, by default ``test_size``.
+    n_workers : int, optional
+        Number of worker processes; 1 runs in the current process, by
+        default 1.
+
+    Returns
+    -------
+    pandas.DataFrame
+        One row per fold and parameter set, ordered by test date.
+    """
+    if not returns.index.equals(factor_returns.index):
+        raise ValueError("Returns and factors must share the same dates")
+    if isinstance(param_grid, Mapping):
+        param_sets = parameter_grid(param_grid)
+    else:
+        param_sets = [dict(p) for p in param_grid]
+    min_train = max(int({**DEFAULT_PARAMS, **p}["window"]) for p in param_sets)
+    splits = walk_forward_splits(len(returns), min_train, test_size, step)
+    tasks = [(start, end, p) for start, end in splits for p in param_sets]
+
+    if n_workers <= 1:
+        rows = [evaluate_fold(returns, factor_returns, *task) for task in tasks]
+    else:
+        segments, specs = [], {}
+        try:
+            for key, frame in (("returns", returns), ("factors", factor_returns)):
+                segment, specs[key] = _share(frame)
+                segments.append(segment)
+            with ProcessPoolExecutor(
+                max_workers=n_workers, initializer=_init_worker, initargs=(specs,)
+            ) as pool:
+                futures = [pool.submit(_run_shared, *task) for task in tasks]
+                rows = [future.result() for future in as_completed(futures)]
+        finally:
+            for segment in segments:
+                segment.close()
+                segment.unlink()
+
+    table = pd.DataFrame(rows)
+    if table.empty:
+        return table
+    sort_keys = ["test_start"] + [k for k in DEFAULT_PARAMS if k in table.columns]
+    return table.sort_values(sort_keys, na_position="first").reset_index(drop=True)
+
+
+__all__ = [
+    "DEFAULT_PARAMS",
+    "parameter_grid",
+    "walk_forward_splits",
+    "evaluate_fold",
+    "walk_forward",
+]
@@ -0,0 +1,7 @@
+import os
+import sys
+
+SRC = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+for path in (SRC, os.path.join(SRC, "helper")):
+    if path not in sys.path:
+        sys.path.insert(0, path)
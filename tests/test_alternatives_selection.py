@@ -0,0 +1,52 @@
+"""Vectorised momentum engine against the ``rolling``-based reference."""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from portfolioConstruction.alternatives_selection import (
+    cumulative_returns,
+    long_short_baskets,
+    price_momentum,
+)
+
+
+def _rolling_reference(returns, window):
+    return returns.rolling(window).apply(lambda x: np.prod(x + 1), raw=True) - 1
+
+
+def test_cumulative_returns_matches_rolling_product():
+    rng = np.random.default_rng(0)
+    returns = pd.DataFrame(rng.normal(0, 0.05, (40, 4)), columns=list("abcd"))
+    returns.iloc[5, 1] = np.nan
+    result = cumulative_returns(returns, (1, 3, 12))
+    for window, frame in result.items():
+        expected = _rolling_reference(returns, window)
+        np.testing.assert_allclose(frame.values, expected.values, equal_nan=True)
+
+
+def test_cumulative_returns_recovers_after_total_loss():
+    returns = pd.DataFrame(
+        {"a": [0.1, -1.0, 0.1, 0.1, 0.1, 0.1], "b": [0.1, -1.5, 0.2, 0.1, 0.1, 0.1]}
+    )
+    result = cumulative_returns(returns, (2,))[2]
+    np.testing.assert_allclose(result["a"].iloc[3:], 0.21)
+    np.testing.assert_allclose(
+        result.values, _rolling_reference(returns, 2).values, equal_nan=True
+    )
+
+
+@pytest.mark.parametrize("function", [cumulative_returns, price_momentum])
+def test_lookbacks_must_be_positive(function):
+    frame = pd.DataFrame({"a": [1.0, 1.1, 1.2]})
+    with pytest.raises(ValueError, match="lookback windows must be positive"):
+        function(frame, (3, 0))
+
+
+def test_long_short_baskets_break_ties_in_column_order():
+    signal = pd.DataFrame(
+        [[1.0, 1.0, 1.0, 1.0], [2.0, 1.0, 1.0, np.nan]], columns=list("abcd")
+    )
+    long, short = long_short_baskets(signal, 2)
+    assert long.values.tolist() == [[True, True, False, False], [True, True, False, False]]
+    assert short.values.tolist() == [[True, True, False, False], [False, True, True, False]]
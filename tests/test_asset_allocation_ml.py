@@ -0,0 +1,35 @@
+"""Constrained mean-variance allocation."""
+
+import numpy as np
+import pandas as pd
+
+from portfolioConstruction.asset_allocation_ml import (
+    MeanVarianceRebalancer,
+    constrained_mean_variance_weights,
+)
+
+
+def _inputs():
+    rng = np.random.default_rng(3)
+    assets = list("abcdefgh")
+    factors = rng.normal(0, 0.1, (8, 8))
+    cov = factors @ factors.T / 8 + np.eye(8) * 0.01
+    mu = pd.Series(rng.normal(0.05, 0.03, 8), index=assets)
+    return mu, cov
+
+
+def test_first_rebalance_ignores_turnover_penalty():
+    mu, cov = _inputs()
+    expected = constrained_mean_variance_weights(mu, cov, risk_aversion=3.0, weight_limit=0.3)
+    rebalancer = MeanVarianceRebalancer(risk_aversion=3.0, weight_limit=0.3, turnover_penalty=5.0)
+    pd.testing.assert_series_equal(rebalancer.rebalance(mu, cov), expected, atol=1e-6)
+
+
+def test_later_rebalances_penalise_turnover():
+    mu, cov = _inputs()
+    rebalancer = MeanVarianceRebalancer(risk_aversion=3.0, weight_limit=0.3, turnover_penalty=5.0)
+    first = rebalancer.rebalance(mu, cov)
+    shifted = mu[::-1].set_axis(mu.index)
+    unpenalised = constrained_mean_variance_weights(shifted, cov, risk_aversion=3.0, weight_limit=0.3)
+    second = rebalancer.rebalance(shifted, cov)
+    assert np.abs(second - first).sum() < np.abs(unpenalised - first).sum()
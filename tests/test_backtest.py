@@ -0,0 +1,36 @@
+"""Backtests over time-varying weights."""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from portfolioConstruction.backtest import run_backtest
+
+
+def _prices():
+    dates = pd.date_range("2020-01-31", periods=8, freq="ME")
+    growth = 1 + np.random.default_rng(1).normal(0, 0.03, (8, 2))
+    return pd.DataFrame(np.cumprod(growth, axis=0), index=dates, columns=["x", "y"])
+
+
+def _weights(dates):
+    index = pd.MultiIndex.from_product([dates, ["s"]])
+    return pd.DataFrame([[0.5, 0.5], [1.0, 0.0]], index=index, columns=["x", "y"])
+
+
+def test_backtest_starts_at_first_weight_date():
+    prices = _prices()
+    weights = _weights([prices.index[3] - pd.Timedelta(days=10), prices.index[5]])
+    result = run_backtest(weights, prices)
+    expected = run_backtest(weights, prices.loc[prices.index[3] :])
+    assert result.nav.index[0] == prices.index[3]
+    pd.testing.assert_frame_equal(result.nav, expected.nav)
+    pd.testing.assert_frame_equal(result.turnover, expected.turnover)
+
+
+def test_backtest_needs_prices_after_first_weight_date():
+    prices = _prices()
+    late = prices.index[-1] + pd.Timedelta(days=1)
+    weights = _weights([late, late + pd.Timedelta(days=1)])
+    with pytest.raises(ValueError, match="No prices on or after the first weight date"):
+        run_backtest(weights, prices)
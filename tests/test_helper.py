@@ -0,0 +1,35 @@
+"""Concurrent loading of input files."""
+
+import pandas as pd
+
+import helper
+
+
+def test_load_many_accepts_list_requests(monkeypatch):
+    calls = []
+
+    def fake_load(*args, **kwargs):
+        calls.append(args)
+        return pd.DataFrame({"args": [repr(args)]})
+
+    monkeypatch.setattr(helper, "load_data", fake_load)
+    requests = [
+        "HW_World.xlsx",
+        ["HW_DJIA_Prices.xlsx", 4],
+        ("HW_DJIA_Prices.xlsx", 4),
+        ("Book.xlsx", 0, ["a", "b"]),
+        ["Book.xlsx", 0, ["a", "b"]],
+    ]
+    result = helper.load_many(requests, max_workers=1)
+
+    assert list(result) == [
+        "HW_World.xlsx",
+        ("HW_DJIA_Prices.xlsx", 4),
+        ("Book.xlsx", 0, ("a", "b")),
+    ]
+    # Each distinct request is loaded once, with its arguments as given.
+    assert calls == [
+        ("HW_World.xlsx",),
+        ("HW_DJIA_Prices.xlsx", 4),
+        ("Book.xlsx", 0, ["a", "b"]),
+    ]
@@ -0,0 +1,77 @@
+"""Importing the package and helper modules stays cheap and side-effect free."""
+
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+SRC = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+HELPER = os.path.join(SRC, "helper")
+HEAVY = ("matplotlib", "seaborn", "openpyxl", "scipy")
+# Import time on top of NumPy and pandas.  benchmarks/import_budget.py
+# holds the tighter 150 ms target; this leaves room for slow CI machines.
+IMPORT_BUDGET_MS = 500
+
+_PROBE = """
+import importlib, json, os, sys
+sys.path[:0] = {paths!r}
+path, cwd = list(sys.path), os.getcwd()
+importlib.import_module({module!r})
+print(json.dumps({{
+    "heavy": sorted(m for m in {heavy!r} if m in sys.modules),
+    "path_changed": sys.path != path,
+    "cwd_changed": os.getcwd() != cwd,
+}}))
+"""
+
+_TIMER = """
+import importlib, sys, time
+sys.path[:0] = {paths!r}
+import numpy, pandas
+start = time.perf_counter()
+importlib.import_module({module!r})
+print(time.perf_counter() - start)
+"""
+
+
+def _run(code):
+    output = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    ).stdout
+    return output.strip().splitlines()[-1]
+
+
+@pytest.mark.parametrize(
+    "module, paths",
+    [
+        ("portfolioConstruction", [SRC]),
+        ("helper", [HELPER]),
+        ("helper", [SRC, HELPER]),
+    ],
+)
+def test_import_is_light_and_side_effect_free(module, paths):
+    code = _PROBE.format(paths=paths, module=module, heavy=HEAVY)
+    result = json.loads(_run(code))
+    assert result == {"heavy": [], "path_changed": False, "cwd_changed": False}
+
+
+@pytest.mark.parametrize(
+    "module, paths",
+    [
+        ("helper", [SRC, HELPER]),
+        ("hedgeFund", [HELPER]),
+        ("resultsStore", [HELPER]),
+        ("visulize", [HELPER]),
+        ("portfolioConstruction", [SRC]),
+        ("portfolioConstruction.pipeline", [SRC]),
+        ("portfolioConstruction.live", [SRC]),
+        ("portfolioConstruction.panel", [SRC]),
+    ],
+)
+def test_import_time_within_budget(module, paths):
+    # Best of three fresh interpreters, to ride out a cold disk cache.
+    code = _TIMER.format(paths=paths, module=module)
+    elapsed_ms = min(float(_run(code)) for _ in range(3)) * 1e3
+    assert elapsed_ms < IMPORT_BUDGET_MS, f"{module} took {elapsed_ms:.0f} ms to import"
@@ -0,0 +1,40 @@
+"""Streaming portfolio updates."""
+
+import numpy as np
+import pandas as pd
+
+from portfolioConstruction.live import LivePortfolio
+
+
+def _stream(n_rows=30):
+    rng = np.random.default_rng(4)
+    factors = rng.normal(0, 0.02, (n_rows, 2))
+    loadings = rng.normal(1, 0.5, (2, 6))
+    returns = factors @ loadings + rng.normal(0, 0.01, (n_rows, 6))
+    return (
+        pd.DataFrame(returns, columns=list("abcdef")),
+        pd.DataFrame(factors, columns=["mkt", "val"]),
+    )
+
+
+def _allocations(turnover_penalty):
+    returns, factors = _stream()
+    live = LivePortfolio(
+        returns.columns,
+        factors.columns,
+        equity_top_n=6,
+        weight_limit=0.4,
+        turnover_penalty=turnover_penalty,
+    )
+    snapshots = (live.update(returns.iloc[t], factors.iloc[t]) for t in range(len(returns)))
+    return [s.weights for s in snapshots if len(s.weights)]
+
+
+def _turnover(path):
+    return sum(np.abs(b - a).sum() for a, b in zip(path, path[1:]))
+
+
+def test_first_live_allocation_ignores_turnover_penalty():
+    free, penalised = _allocations(0.0), _allocations(50.0)
+    pd.testing.assert_series_equal(penalised[0], free[0], atol=1e-6)
+    assert _turnover(penalised) < _turnover(free)
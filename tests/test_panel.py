@@ -0,0 +1,40 @@
+"""Chunked panel computations against their in-memory counterparts."""
+
+import numpy as np
+import pandas as pd
+
+from portfolioConstruction.panel import Panel, panel_evaluate_risk, panel_portfolio_returns
+from portfolioConstruction.risk_management import evaluate_risk_batch
+
+
+def _returns():
+    rng = np.random.default_rng(2)
+    returns = pd.DataFrame(rng.normal(0, 0.02, (30, 6)), columns=list("abcdef"))
+    returns.iloc[4, 5] = np.nan
+    return returns
+
+
+def test_portfolio_returns_propagate_nan_like_batch():
+    returns = _returns()
+    weights = np.array([[0.5, 0.5, 0.0, 0.0, 0.0, 0.0], [0.0, 0.0, 0.3, 0.3, 0.4, 0.0]])
+    panel = Panel.from_frame(returns, dtype=float)
+    result = panel_portfolio_returns(weights, panel, chunk_size=1)
+    expected = returns.values @ weights.T
+    np.testing.assert_array_equal(np.isnan(result), np.isnan(expected))
+    np.testing.assert_allclose(result, expected, equal_nan=True)
+    assert np.isnan(result[4]).all()
+
+
+def test_panel_evaluate_risk_matches_batch():
+    returns = _returns()
+    weights = pd.DataFrame(
+        [[0.5, 0.5, 0, 0, 0, 0], [0, 0, 0.3, 0.3, 0.4, 0]],
+        index=["p", "q"],
+        columns=returns.columns,
+        dtype=float,
+    )
+    panel = Panel.from_frame(returns, dtype=float)
+    result = panel_evaluate_risk(weights, panel, chunk_size=1)
+    expected = evaluate_risk_batch(weights, returns)
+    for key in ("var", "cvar", "volatility"):
+        pd.testing.assert_series_equal(result[key], expected[key])